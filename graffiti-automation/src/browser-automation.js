@@ -11,11 +11,11 @@ const __dirname = path.dirname(__filename);
 /**
  * Main automation orchestrator
  */
-export async function submitForm(formUrl, naturalLanguageInput, imageBase64 = null) {
+export async function submitForm(formUrl, naturalLanguageInput, image = null) {
   console.log('\n🚀 Starting form automation...');
   console.log(`📄 Form URL: ${formUrl}`);
   console.log(`💬 Input: "${naturalLanguageInput}"`);
-  if (imageBase64) console.log(`📷 Image: Provided (${(imageBase64.length / 1024).toFixed(2)} KB)`);
+  if (image) console.log(`📷 Image: Provided (${(image.length / 1024).toFixed(2)} KB)`);
   console.log();
 
   let browser;
@@ -24,16 +24,18 @@ export async function submitForm(formUrl, naturalLanguageInput, imageBase64 = nu
   let imagePath = null;
 
   try {
-    // Step 0: Save image if provided
-    if (imageBase64) {
+    // Step 0: Save image if provided (raw bytes, or a base64 string from JSON clients)
+    if (image) {
       const tempDir = path.join(__dirname, '../temp');
       if (!fs.existsSync(tempDir)) {
         fs.mkdirSync(tempDir, { recursive: true });
       }
 
       imagePath = path.join(tempDir, `upload-${Date.now()}.png`);
-      const base64Data = imageBase64.replace(/^data:image\/\w+;base64,/, '');
-      fs.writeFileSync(imagePath, Buffer.from(base64Data, 'base64'));
+      const imageBuffer = Buffer.isBuffer(image)
+        ? image
+        : Buffer.from(image.replace(/^data:image\/\w+;base64,/, ''), 'base64');
+      fs.writeFileSync(imagePath, imageBuffer);
       console.log(`💾 Image saved to: ${imagePath}\n`);
     }
 
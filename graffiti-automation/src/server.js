@@ -13,9 +13,13 @@ app.use(express.static('public'));
  * Main API endpoint
  * POST /api/submit
  * Body: { formUrl: string, description: string, image?: string (base64) }
+ *   or: raw image bytes (Content-Type: image/*) with ?formUrl=...&description=...
  */
-app.post('/api/submit', async (req, res) => {
-  const { formUrl, description, image } = req.body;
+app.post('/api/submit', express.raw({ type: 'image/*', limit: '50mb' }), async (req, res) => {
+  // Raw uploads skip the base64 round-trip; their fields come from the query string
+  const isRawImage = Buffer.isBuffer(req.body);
+  const { formUrl, description } = isRawImage ? req.query : req.body;
+  const image = isRawImage ? req.body : (req.body.image || req.body.imageBase64);
 
   if (!formUrl || !description) {
     return res.status(400).json({
@@ -0,0 +1,65 @@
+"""Migration script to add the (user_id, timestamp DESC) index on messages without blocking writes."""
+import asyncio
+import asyncpg
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load .env.local
+dotenv_path = Path(__file__).parent / '.env.local'
+load_dotenv(dotenv_path=dotenv_path)
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    raise ValueError("DATABASE_URL not found in environment")
+
+# Convert to asyncpg format
+if DATABASE_URL.startswith("postgresql+asyncpg://"):
+    DATABASE_URL = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+async def drop_invalid_index(conn, name: str):
+    """Drop an index left INVALID by an interrupted CONCURRENTLY build, so IF NOT EXISTS rebuilds it."""
+    invalid = await conn.fetchval("""
+        SELECT NOT i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = $1
+    """, name)
+    if invalid:
+        print(f"🧹 Dropping invalid index {name} from an earlier failed run...")
+        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+async def migrate():
+    """Create ix_messages_user_ts concurrently and drop the index it replaces."""
+    print("🔄 Connecting to database...")
+    conn = await asyncpg.connect(DATABASE_URL)
+
+    try:
+        # CONCURRENTLY can't run inside a transaction; asyncpg autocommits
+        # each statement outside conn.transaction()
+        await drop_invalid_index(conn, "ix_messages_user_ts")
+
+        print("📝 Creating index ix_messages_user_ts (concurrently)...")
+        await conn.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_user_ts
+            ON messages (user_id, timestamp DESC)
+        """)
+
+        # The old schema.sql index on user_id alone is a prefix of the new one
+        print("📝 Dropping redundant index idx_messages_user_id...")
+        await conn.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_messages_user_id")
+
+        print("✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+    finally:
+        await conn.close()
+        print("🔌 Database connection closed")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,73 @@
+"""Migration script to convert messages.image_data from base64 TEXT to BYTEA."""
+import asyncio
+import asyncpg
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load .env.local
+dotenv_path = Path(__file__).parent / '.env.local'
+load_dotenv(dotenv_path=dotenv_path)
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    raise ValueError("DATABASE_URL not found in environment")
+
+# Convert to asyncpg format
+if DATABASE_URL.startswith("postgresql+asyncpg://"):
+    DATABASE_URL = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+async def migrate():
+    """Decode existing base64 image_data into a BYTEA column."""
+    print("🔄 Connecting to database...")
+    conn = await asyncpg.connect(DATABASE_URL)
+
+    try:
+        # Check current column type
+        result = await conn.fetchval("""
+            SELECT data_type
+            FROM information_schema.columns
+            WHERE table_name = 'messages' AND column_name = 'image_data'
+        """)
+
+        if result is None:
+            print("❌ image_data column not found - run migrate_add_image_data.py first")
+            return
+
+        if result == "bytea":
+            print("✅ image_data is already BYTEA, skipping migration")
+            return
+
+        print("📝 Converting image_data from TEXT (base64) to BYTEA...")
+        async with conn.transaction():
+            await conn.execute("""
+                ALTER TABLE messages
+                ADD COLUMN image_data_bin BYTEA NULL
+            """)
+            await conn.execute("""
+                UPDATE messages
+                SET image_data_bin = decode(image_data, 'base64')
+                WHERE image_data IS NOT NULL
+            """)
+            await conn.execute("""
+                ALTER TABLE messages
+                DROP COLUMN image_data
+            """)
+            await conn.execute("""
+                ALTER TABLE messages
+                RENAME COLUMN image_data_bin TO image_data
+            """)
+
+        print("✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+    finally:
+        await conn.close()
+        print("🔌 Database connection closed")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,84 @@
+"""Migration script to convert timestamp columns to TIMESTAMPTZ and add a BRIN index."""
+import asyncio
+import asyncpg
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load .env.local
+dotenv_path = Path(__file__).parent / '.env.local'
+load_dotenv(dotenv_path=dotenv_path)
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    raise ValueError("DATABASE_URL not found in environment")
+
+# Convert to asyncpg format
+if DATABASE_URL.startswith("postgresql+asyncpg://"):
+    DATABASE_URL = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+# (table, column) pairs stored as naive UTC timestamps by NOW()
+COLUMNS = [("users", "created_at"), ("messages", "timestamp")]
+
+
+async def migrate():
+    """Convert naive TIMESTAMP columns to TIMESTAMPTZ (interpreted as UTC)."""
+    print("🔄 Connecting to database...")
+    conn = await asyncpg.connect(DATABASE_URL)
+
+    try:
+        for table, column in COLUMNS:
+            data_type = await conn.fetchval("""
+                SELECT data_type
+                FROM information_schema.columns
+                WHERE table_name = $1 AND column_name = $2
+            """, table, column)
+
+            if data_type == "timestamp with time zone":
+                print(f"✅ {table}.{column} is already TIMESTAMPTZ, skipping")
+                continue
+
+            print(f"📝 Converting {table}.{column} to TIMESTAMPTZ...")
+            await conn.execute(f"""
+                ALTER TABLE {table}
+                ALTER COLUMN "{column}" TYPE TIMESTAMPTZ
+                USING "{column}" AT TIME ZONE 'UTC'
+            """)
+
+        # Per-row clock so messages inserted in one transaction stay ordered
+        await conn.execute("""
+            ALTER TABLE messages
+            ALTER COLUMN "timestamp" SET DEFAULT clock_timestamp()
+        """)
+
+        # CONCURRENTLY can't run inside a transaction; asyncpg autocommits
+        # each statement outside conn.transaction(). An INVALID index left by
+        # an interrupted run is dropped first so IF NOT EXISTS rebuilds it.
+        invalid = await conn.fetchval("""
+            SELECT NOT i.indisvalid
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = 'ix_messages_timestamp_brin'
+        """)
+        if invalid:
+            print("🧹 Dropping invalid BRIN index from an earlier failed run...")
+            await conn.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_messages_timestamp_brin")
+
+        print("📝 Creating BRIN index on messages.timestamp (concurrently)...")
+        await conn.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_timestamp_brin
+            ON messages USING brin(timestamp)
+        """)
+
+        print("✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        raise
+    finally:
+        await conn.close()
+        print("🔌 Database connection closed")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
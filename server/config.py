@@ -1,6 +1,6 @@
 """Configuration module for loading environment variables."""
+import logging
 import os
-import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -11,11 +11,7 @@ project_root = Path(__file__).parent.parent
 dotenv_path = project_root / '.env.local'
 load_dotenv(dotenv_path=dotenv_path)
 
-# Verify API key is loaded
-if not os.getenv('GEMINI_API_KEY'):
-    print('❌ ERROR: GEMINI_API_KEY not found in environment variables!')
-    print('   Please make sure .env.local exists in the project root with GEMINI_API_KEY set.')
-    sys.exit(1)
+logger = logging.getLogger(__name__)
 
 
 class Config:
@@ -27,7 +23,24 @@ class Config:
     TWILIO_ACCOUNT_SID: str = os.getenv('TWILIO_ACCOUNT_SID', '')
     TWILIO_AUTH_TOKEN: str = os.getenv('TWILIO_AUTH_TOKEN', '')
     TWILIO_API_KEY: str = os.getenv('TWILIO_API_KEY', '')
+    # Max concurrent Dedalus / Gemini calls (each attempt holds a slot)
+    DEDALUS_CONCURRENCY: int = int(os.getenv('DEDALUS_CONCURRENCY', 8))
+    GEMINI_CONCURRENCY: int = int(os.getenv('GEMINI_CONCURRENCY', 8))
+    # Per-attempt timeouts (seconds) and attempt count for outbound calls
+    DEDALUS_TIMEOUT_SECONDS: float = float(os.getenv('DEDALUS_TIMEOUT_SECONDS', 60))
+    SF311_SUBMIT_TIMEOUT_SECONDS: float = float(os.getenv('SF311_SUBMIT_TIMEOUT_SECONDS', 25))
+    MEDIA_FETCH_TIMEOUT_SECONDS: float = float(os.getenv('MEDIA_FETCH_TIMEOUT_SECONDS', 20))
+    # Largest media download accepted (WhatsApp caps media at 16 MB)
+    MAX_MEDIA_BYTES: int = int(os.getenv('MAX_MEDIA_BYTES', 16 * 1024 * 1024))
+    MAX_RETRIES: int = max(1, int(os.getenv('MAX_RETRIES', 3)))
+
+    def validate(self) -> None:
+        """Verify required settings; called at app startup rather than on import."""
+        if not self.GEMINI_API_KEY:
+            logger.error('❌ GEMINI_API_KEY not found in environment variables! '
+                         'Please make sure .env.local exists in the project root with GEMINI_API_KEY set.')
+            raise RuntimeError('GEMINI_API_KEY is not set')
+        logger.info('✅ Configuration loaded successfully')
 
 
 config = Config()
-print('✅ Configuration loaded successfully')
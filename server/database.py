@@ -1,12 +1,16 @@
 """PostgreSQL database connection and models."""
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import String, Text, DateTime, ForeignKey, text, select
-from datetime import datetime, timedelta
+from sqlalchemy import String, Text, DateTime, ForeignKey, Index, LargeBinary, func, text, select
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+import asyncio
+import logging
 import os
-from uuid import UUID, uuid4
+from uuid import UUID
 
+logger = logging.getLogger(__name__)
 
 # Database URL from environment or default to local PostgreSQL
 DATABASE_URL = os.getenv(
@@ -18,8 +22,22 @@ DATABASE_URL = os.getenv(
 if DATABASE_URL.startswith("postgresql://"):
     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
 
+# Connection pool settings (SQL echo is off unless DB_ECHO=true; it logs every statement)
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 40))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", 5))
+
 # Create async engine
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=DB_ECHO,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=DB_POOL_RECYCLE_SECONDS,
+)
 
 # Create async session factory
 async_session_maker = async_sessionmaker(
@@ -42,8 +60,8 @@ class User(Base):
     )
     phone_number: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime,
-        server_default=text("NOW()")
+        DateTime(timezone=True),
+        server_default=func.now()
     )
 
     # Relationship
@@ -66,21 +84,44 @@ class Message(Base):
     content: Mapped[str] = mapped_column(Text, nullable=False)
     content_type: Mapped[str] = mapped_column(String(50), nullable=False)
     is_from_user: Mapped[bool] = mapped_column(default=True, nullable=False)
-    image_data: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # Base64 encoded image
+    image_data: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)  # Raw image bytes (BYTEA)
+    # clock_timestamp() rather than now(): rows written in one transaction
+    # (text + media from a single webhook) must keep their insertion order
     timestamp: Mapped[datetime] = mapped_column(
-        DateTime,
-        server_default=text("NOW()")
+        DateTime(timezone=True),
+        server_default=func.clock_timestamp()
     )
 
     # Relationship
     user: Mapped["User"] = relationship("User", back_populates="messages")
 
 
+# Serves get_recent_messages: backward index scan returns the newest N per user
+Index("ix_messages_user_ts", Message.user_id, Message.timestamp.desc())
+# Append-only time column: BRIN is tiny and serves time-range scans across all users
+Index("ix_messages_timestamp_brin", Message.timestamp, postgresql_using="brin")
+
+
+async def warm_pool(size: int = DB_POOL_WARM):
+    """Open `size` pooled connections up front so the first webhooks skip the connect handshake."""
+    size = min(size, DB_POOL_SIZE)
+    if size <= 0:
+        return
+    conns = await asyncio.gather(*(engine.connect() for _ in range(size)))
+    await asyncio.gather(*(conn.close() for conn in conns))
+
+
 async def init_db():
-    """Initialize database - create all tables."""
+    """
+    Initialize database - create all tables.
+
+    create_all only adds indexes along with new tables. Existing tables get
+    them from the migration scripts (CREATE INDEX CONCURRENTLY), never at startup.
+    """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-    print("✅ Database initialized")
+    await warm_pool()
+    logger.info("✅ Database initialized")
 
 
 async def get_db() -> AsyncSession:
@@ -89,10 +130,15 @@ async def get_db() -> AsyncSession:
         yield session
 
 
-async def get_recent_messages(db: AsyncSession, user_id: UUID, limit: int = 10, minutes: int = 10) -> list[Message]:
+async def get_recent_messages(db: AsyncSession, user_id: UUID, limit: int = 10, minutes: int = 10) -> list[dict]:
     """
     Get recent messages for a user from the last N minutes in chronological order (oldest first).
 
+    Only the columns needed for conversation analysis are selected, and rows
+    come back as plain dicts rather than ORM objects. Image bytes are not
+    loaded here (only a has_image flag); use get_message_image for the one
+    image that is actually needed.
+
     Args:
         db: Database session
         user_id: User ID
@@ -100,18 +146,80 @@ async def get_recent_messages(db: AsyncSession, user_id: UUID, limit: int = 10,
         minutes: Only retrieve messages from the last N minutes (default 10)
 
     Returns:
-        List of Message objects in chronological order
+        List of dicts with id, content, is_from_user, content_type and
+        has_image, in chronological order
     """
-    cutoff_time = datetime.utcnow() - timedelta(minutes=minutes)
-
-    result = await db.execute(
-        select(Message)
+    cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+
+    # Newest N in a subquery, re-sorted oldest first by the database
+    recent = (
+        select(
+            Message.id,
+            Message.content,
+            Message.is_from_user,
+            Message.content_type,
+            Message.image_data.is_not(None).label("has_image"),
+            Message.timestamp
+        )
         .where(Message.user_id == user_id)
         .where(Message.timestamp >= cutoff_time)
         .order_by(Message.timestamp.desc())
         .limit(limit)
+        .subquery()
+    )
+
+    result = await db.execute(
+        select(
+            recent.c.id,
+            recent.c.content,
+            recent.c.is_from_user,
+            recent.c.content_type,
+            recent.c.has_image
+        ).order_by(recent.c.timestamp.asc())
+    )
+    return [dict(row) for row in result.mappings()]
+
+
+# Message rows are never updated, so image bytes can be cached by message id.
+# Bounded by total bytes rather than entry count since images are large.
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+_image_cache: "OrderedDict[UUID, bytes]" = OrderedDict()
+_image_cache_bytes = 0
+
+
+async def get_message_image(db: AsyncSession, message_id: UUID) -> Optional[bytes]:
+    """
+    Get a message's image bytes, cached by message id across conversation turns.
+
+    Args:
+        db: Database session
+        message_id: Message ID
+
+    Returns:
+        Raw image bytes, or None if the message has no image
+    """
+    image_data = _image_cache.get(message_id)
+    if image_data is not None:
+        _image_cache.move_to_end(message_id)
+        return image_data
+
+    image_data = await db.scalar(
+        select(Message.image_data).where(Message.id == message_id)
     )
-    messages = list(result.scalars().all())
-    # Reverse to get chronological order (oldest first)
-    messages.reverse()
-    return messages
+    if image_data is not None:
+        cache_message_image(message_id, image_data)
+    return image_data
+
+
+def cache_message_image(message_id: UUID, image_data: bytes) -> None:
+    """Seed the image cache, e.g. with bytes just written for a new message."""
+    global _image_cache_bytes
+
+    if len(image_data) > IMAGE_CACHE_MAX_BYTES or message_id in _image_cache:
+        return
+
+    _image_cache[message_id] = image_data
+    _image_cache_bytes += len(image_data)
+    while _image_cache_bytes > IMAGE_CACHE_MAX_BYTES:
+        _, evicted = _image_cache.popitem(last=False)
+        _image_cache_bytes -= len(evicted)
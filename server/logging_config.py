@@ -0,0 +1,42 @@
+"""Application logging setup.
+
+Log records are handed to a queue by the calling thread and formatted/written
+to stderr by a background listener thread, so logging from request handlers
+never blocks the event loop on a write(2) syscall.
+"""
+import logging
+import logging.handlers
+import os
+import queue
+from typing import Optional
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: str = LOG_LEVEL) -> None:
+    """Route the root logger through a QueueHandler drained by a QueueListener."""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
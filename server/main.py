@@ -1,4 +1,5 @@
 """Main FastAPI application for the WhatsApp bot backend."""
+import logging
 from datetime import datetime
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,22 +9,36 @@ from contextlib import asynccontextmanager
 try:
     # Try absolute imports (for local development)
     from server.config import config
+    from server.logging_config import setup_logging, shutdown_logging
     from server.routes.twilio_webhook import router as twilio_router
+    from server.routes.messages import router as messages_router
     from server.database import init_db
+    from server.services.http_client import close_http_client
 except ModuleNotFoundError:
     # Fall back to relative imports (for deployment)
     from config import config
+    from logging_config import setup_logging, shutdown_logging
     from routes.twilio_webhook import router as twilio_router
+    from routes.messages import router as messages_router
     from database import init_db
+    from services.http_client import close_http_client
+
+
+setup_logging()
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup."""
-    print("🚀 Starting up...")
+    """Validate configuration and initialize database on startup."""
+    logger.info("🚀 Starting up...")
+    config.validate()
     await init_db()
     yield
-    print("👋 Shutting down...")
+    logger.info("👋 Shutting down...")
+    await close_http_client()
+    shutdown_logging()
 
 
 # Create FastAPI app
@@ -45,6 +60,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(twilio_router)
+app.include_router(messages_router)
 
 
 # Pydantic models for API responses
@@ -67,12 +83,14 @@ async def health_check():
 if __name__ == '__main__':
     import uvicorn
 
-    print(f'🚀 Starting server on http://localhost:{config.PORT}')
-    print(f'📱 Twilio webhook URL: http://localhost:{config.PORT}/twilio/webhook')
+    logger.info('🚀 Starting server on http://localhost:%s', config.PORT)
+    logger.info('📱 Twilio webhook URL: http://localhost:%s/twilio/webhook', config.PORT)
 
     uvicorn.run(
         app,
         host='0.0.0.0',
         port=config.PORT,
+        loop='uvloop',
+        http='httptools',
         log_level='info'
     )
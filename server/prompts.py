@@ -1,18 +1,22 @@
 """Centralized prompts for Gemini AI analysis.
 
 Edit these prompts to change how the AI analyzes different types of content.
+Placeholders use string.Template syntax ($name), so JSON braces need no escaping.
+Keep placeholders at the end: an identical static prefix lets Gemini reuse its
+implicit prompt cache across calls.
 """
+from string import Template
 
 # IMAGE ANALYSIS PROMPT
-IMAGE_PROMPT = """Describe what's happening in this image. Focus on:
+IMAGE_PROMPT = Template("""Describe what's happening in this image. Focus on:
 - What is shown in the image
 - Any issues or problems visible (e.g., damage, graffiti, broken items)
 - Location details if visible (street signs, addresses, landmarks)
 - Any other relevant details
 
-{context}
+Provide a clear, concise description in 2-3 sentences.
 
-Provide a clear, concise description in 2-3 sentences."""
+$context""")
 
 
 # VIDEO ANALYSIS PROMPT (used as system instruction for Gemini Live)
@@ -23,3 +27,48 @@ VIDEO_PROMPT = """Analyze this video and describe what's happening. Focus on:
 - Audio content if present
 
 Provide a clear, concise description in 2-3 sentences."""
+
+
+# CONVERSATION ANALYSIS PROMPT (Gemini-only analyze_conversation)
+CONVERSATION_PROMPT = Template("""You are a helpful assistant for SF 311 service requests. Your job is to understand what issue the user is reporting and where it's located.
+
+Analyze the following conversation and extract:
+1. **reporting**: What is being reported (e.g., "broken pothole", "graffiti", "illegal dumping")
+2. **location**: Where is it located (full address if possible, e.g., "1160 Mission Street, San Francisco")
+
+If BOTH reporting and location are clear, set needs_clarification to false and provide a confirmation message.
+If EITHER is unclear or missing, set needs_clarification to true and ask specifically for what's missing.
+
+Respond with ONLY valid JSON in this exact format:
+{
+    "reporting": "what is being reported or null if unclear",
+    "location": "where it is located or null if unclear",
+    "needs_clarification": true/false,
+    "clarification_question": "question to ask if needs_clarification is true, otherwise null",
+    "response_message": "friendly message to send to the user"
+}
+
+Examples:
+
+If user says "there's a pothole on mission street":
+{
+    "reporting": "pothole",
+    "location": "Mission Street",
+    "needs_clarification": true,
+    "clarification_question": "Can you provide the exact address or cross streets for the pothole on Mission Street?",
+    "response_message": "I understand there's a pothole on Mission Street. Can you provide the exact address or cross streets so I can submit this to SF 311?"
+}
+
+If user says "broken pothole at 1160 mission street":
+{
+    "reporting": "pothole",
+    "location": "1160 Mission Street",
+    "needs_clarification": false,
+    "clarification_question": null,
+    "response_message": "Got it! I'll submit a report for a pothole at 1160 Mission Street to SF 311."
+}
+
+CONVERSATION HISTORY:
+$conversation_text
+
+Now analyze the conversation above and respond with JSON only:""")
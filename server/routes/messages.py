@@ -0,0 +1,54 @@
+"""Dashboard API routes for reading stored messages."""
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+try:
+    from server.database import get_db, User, Message
+except ModuleNotFoundError:
+    from database import get_db, User, Message
+
+router = APIRouter(prefix='/api', tags=['messages'])
+
+
+@router.get('/messages', response_class=ORJSONResponse)
+async def list_messages(
+    limit: int = Query(default=100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the most recent messages across all users (newest first).
+
+    Only the columns the dashboard renders are selected (no image bytes), and
+    rows are returned through ORJSONResponse without a response_model so
+    FastAPI skips per-row Pydantic validation and jsonable_encoder.
+
+    Args:
+        limit: Maximum number of messages to return
+    """
+    result = await db.execute(
+        select(
+            Message.id,
+            User.phone_number,
+            Message.content,
+            Message.content_type,
+            Message.is_from_user,
+            Message.timestamp
+        )
+        .join(User, Message.user_id == User.id)
+        .order_by(Message.timestamp.desc())
+        .limit(limit)
+    )
+
+    return ORJSONResponse([
+        {
+            'id': row.id,
+            'from': row.phone_number,
+            'text': row.content,
+            'contentType': row.content_type,
+            'isFromUser': row.is_from_user,
+            'timestamp': row.timestamp
+        }
+        for row in result
+    ])
@@ -1,9 +1,15 @@
 """Twilio webhook routes for handling incoming WhatsApp messages."""
-import base64
-from datetime import datetime
+import asyncio
+import functools
+import logging
+import time
+from collections import OrderedDict
 from typing import Optional
-from fastapi import APIRouter, Form, Response, Depends, BackgroundTasks
-from twilio.twiml.messaging_response import MessagingResponse
+from uuid import UUID
+from xml.sax.saxutils import escape
+from fastapi import APIRouter, Form, Response, BackgroundTasks
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -11,221 +17,339 @@ from sqlalchemy import select
 try:
     from server.services.gemini import analyze_image, analyze_video, fetch_media_bytes
     from server.services.dedalus_service import analyze_conversation_with_dedalus
-    from server.database import get_db, User, Message, get_recent_messages, async_session_maker
+    from server.database import User, Message, get_recent_messages, cache_message_image, async_session_maker
     from server.config import config
 except ModuleNotFoundError:
     from services.gemini import analyze_image, analyze_video, fetch_media_bytes
     from services.dedalus_service import analyze_conversation_with_dedalus
-    from database import get_db, User, Message, get_recent_messages, async_session_maker
+    from database import User, Message, get_recent_messages, cache_message_image, async_session_maker
     from config import config
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix='/twilio', tags=['twilio'])
 
+# TwiML is built from a string template instead of MessagingResponse's XML DOM
+TWIML_MESSAGE_TEMPLATE = '<?xml version="1.0" encoding="UTF-8"?><Response><Message>{body}</Message></Response>'
+
+
+def twiml_message(body: str) -> str:
+    """Render a single-message TwiML response, escaping the message body."""
+    return TWIML_MESSAGE_TEMPLATE.format(body=escape(body))
+
+
+PROCESSING_TWIML = twiml_message("Processing your request...")
 
-def send_whatsapp_message(to: str, message: str):
+MEDIA_FAILED_RESPONSE = "Sorry, I couldn't process your photo or video. Please try sending it again, or describe the issue and its location in a message."
+
+# phone_number -> (expires_at, user_id). Only the id is cached, never the ORM
+# object, so nothing leaks across sessions.
+USER_ID_CACHE_MAXSIZE = 10_000
+USER_ID_CACHE_TTL_SECONDS = 3600
+_user_id_cache: "OrderedDict[str, tuple[float, UUID]]" = OrderedDict()
+
+
+@functools.lru_cache(maxsize=1)
+def get_twilio_client() -> Client:
+    """
+    Build the shared Twilio REST client on first use.
+
+    Reusing one client keeps its requests.Session (and the keep-alive TLS
+    connection to api.twilio.com) alive across outgoing messages.
+    """
+    http_client = TwilioHttpClient(pool_connections=True)
+    http_client.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+    return Client(config.TWILIO_ACCOUNT_SID, config.TWILIO_AUTH_TOKEN, http_client=http_client)
+
+
+async def send_whatsapp_message(to: str, message: str):
     """Send a WhatsApp message via Twilio REST API."""
     try:
-        client = Client(config.TWILIO_ACCOUNT_SID, config.TWILIO_AUTH_TOKEN)
+        client = get_twilio_client()
 
         # Extract phone number from WhatsApp format (whatsapp:+1234567890 -> +1234567890)
         to_number = to.replace('whatsapp:', '')
 
-        # Twilio WhatsApp numbers need the whatsapp: prefix
-        message = client.messages.create(
+        # Twilio WhatsApp numbers need the whatsapp: prefix.
+        # The SDK call is blocking requests I/O, so run it off the event loop.
+        message = await asyncio.to_thread(
+            client.messages.create,
             from_='whatsapp:+14155238886',  # Twilio Sandbox number
             body=message,
             to=f'whatsapp:{to_number}'
         )
 
-        print(f"✅ Message sent via Twilio API: {message.sid}")
+        logger.info("✅ Message sent via Twilio API: %s", message.sid)
         return message.sid
     except Exception as e:
-        print(f"❌ Error sending WhatsApp message: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error sending WhatsApp message: %s", e)
         return None
 
 
 async def process_message_background(user_id, phone_number: str):
     """Background task to process message and send response."""
+    # Dedalus and Gemini calls are capped by semaphores in their services,
+    # held per call, so a retrying analysis doesn't block other conversations
     try:
-        print(f"🔄 Background processing started for {phone_number}")
+        logger.info("🔄 Background processing started for %s", phone_number)
 
-        # Create a new database session for the background task
+        # Read the conversation in a short-lived session so the pooled
+        # connection is returned before the (multi-second) LLM call
         async with async_session_maker() as db:
-            # Get last 10 messages for conversation context
-            recent_messages = await get_recent_messages(db, user_id, limit=10)
-            print(f"📜 Retrieved {len(recent_messages)} recent messages")
-
-            # Convert messages to dict format for Dedalus (include image data)
-            message_dicts = [
-                {
-                    "content": msg.content,
-                    "is_from_user": msg.is_from_user,
-                    "content_type": msg.content_type,
-                    "image_data": msg.image_data if hasattr(msg, 'image_data') else None
-                }
-                for msg in recent_messages
-            ]
-
-            # Analyze conversation with Dedalus
-            print(f"🤖 Analyzing conversation with Dedalus...")
-            try:
-                analysis = await analyze_conversation_with_dedalus(message_dicts)
-                print(f"✅ Dedalus analysis completed: {analysis}")
-            except Exception as e:
-                print(f"❌ Error calling analyze_conversation_with_dedalus: {e}")
-                import traceback
-                traceback.print_exc()
-                # Use fallback
-                analysis = {
-                    "reporting": None,
-                    "location": None,
-                    "needs_clarification": True,
-                    "clarification_question": "I encountered an error. Can you describe what you'd like to report?",
-                    "response_message": "I encountered an error processing your message. Can you tell me what issue you'd like to report and where it's located?"
-                }
-
-            # Get the response message
-            response_text = analysis.get("response_message", "I'm here to help you report issues to SF 311!")
-            print(f"📤 Sending response to user: {response_text}")
-
-            # Store AI response in database
-            message = Message(
+            # Get last 10 messages for conversation context. Rows already
+            # come back as dicts in the format Dedalus expects; images are
+            # referenced by message id and only loaded if a report is submitted
+            message_dicts = await get_recent_messages(db, user_id, limit=10)
+            logger.debug("📜 Retrieved %s recent messages", len(message_dicts))
+
+        # Analyze conversation with Dedalus
+        logger.info("🤖 Analyzing conversation with Dedalus...")
+        try:
+            analysis = await analyze_conversation_with_dedalus(message_dicts, user_id=user_id)
+            logger.debug("✅ Dedalus analysis completed: %s", analysis)
+        except Exception as e:
+            logger.exception("❌ Error calling analyze_conversation_with_dedalus: %s", e)
+            # Use fallback
+            analysis = {
+                "reporting": None,
+                "location": None,
+                "needs_clarification": True,
+                "clarification_question": "I encountered an error. Can you describe what you'd like to report?",
+                "response_message": "I encountered an error processing your message. Can you tell me what issue you'd like to report and where it's located?"
+            }
+
+        # Get the response message
+        response_text = analysis.get("response_message", "I'm here to help you report issues to SF 311!")
+        logger.debug("📤 Sending response to user: %s", response_text)
+
+        # Store AI response in its own transaction (committed on block exit)
+        async with async_session_maker() as db, db.begin():
+            db.add(Message(
                 user_id=user_id,
                 content=response_text,
                 content_type="text",
                 is_from_user=False,
                 image_data=None
-            )
-            db.add(message)
-            await db.commit()
+            ))
 
-            # Send response via Twilio API
-            send_whatsapp_message(phone_number, response_text)
+        # Send response via Twilio API
+        await send_whatsapp_message(phone_number, response_text)
 
-            print(f"✅ Background processing completed for {phone_number}")
+        logger.info("✅ Background processing completed for %s", phone_number)
 
     except Exception as e:
-        print(f"❌ Error in background processing: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in background processing: %s", e)
+
+
+def _cached_user_id(phone_number: str) -> Optional[UUID]:
+    """Return the cached user id for a phone number, or None if missing/expired."""
+    entry = _user_id_cache.get(phone_number)
+    if entry is None:
+        return None
+    expires_at, user_id = entry
+    if expires_at < time.monotonic():
+        del _user_id_cache[phone_number]
+        return None
+    _user_id_cache.move_to_end(phone_number)
+    return user_id
+
+
+def _cache_user_id(phone_number: str, user_id: UUID) -> None:
+    """Remember a phone number's user id, evicting least recently used entries."""
+    _user_id_cache[phone_number] = (time.monotonic() + USER_ID_CACHE_TTL_SECONDS, user_id)
+    _user_id_cache.move_to_end(phone_number)
+    while len(_user_id_cache) > USER_ID_CACHE_MAXSIZE:
+        _user_id_cache.popitem(last=False)
 
 
-async def get_or_create_user(db: AsyncSession, phone_number: str) -> User:
-    """Get existing user or create a new one."""
-    # Try to find existing user
-    result = await db.execute(
-        select(User).where(User.phone_number == phone_number)
+async def get_or_create_user(db: AsyncSession, phone_number: str) -> UUID:
+    """
+    Get the id of an existing user or create a new one (cached by phone number).
+
+    A new user is only flushed (to get its id), not committed; the caller
+    commits it together with the user's messages.
+    """
+    user_id = _cached_user_id(phone_number)
+    if user_id is not None:
+        return user_id
+
+    # Try to find existing user (primary key only; no ORM row hydration)
+    user_id = await db.scalar(
+        select(User.id).where(User.phone_number == phone_number)
     )
-    user = result.scalar_one_or_none()
 
-    if user is None:
-        # Create new user
+    if user_id is None:
+        # Create new user; it is cached on its next message, once committed
         user = User(phone_number=phone_number)
         db.add(user)
-        await db.commit()
-        await db.refresh(user)
-        print(f"👤 Created new user: {phone_number}")
+        await db.flush()
+        logger.info("👤 Created new user: %s", phone_number)
+        return user.id
 
-    return user
+    _cache_user_id(phone_number, user_id)
+    return user_id
 
 
 async def store_message(
     db: AsyncSession,
-    user: User,
+    user_id: UUID,
     content: str,
     content_type: str,
     is_from_user: bool = True,
-    image_data: Optional[str] = None
+    image_data: Optional[bytes] = None,
+    commit: bool = True
 ) -> Message:
-    """Store a message in the database."""
+    """
+    Store a message in the database.
+
+    With commit=False the row is only added to the session, so the caller can
+    write several messages in one transaction and commit once.
+    """
     message = Message(
-        user_id=user.id,
+        user_id=user_id,
         content=content,
         content_type=content_type,
         is_from_user=is_from_user,
         image_data=image_data
     )
     db.add(message)
-    await db.commit()
-    await db.refresh(message)
+    if commit:
+        await db.commit()
+        await db.refresh(message)
     return message
 
 
-async def process_and_store_media(
-    db: AsyncSession,
-    user: User,
-    media_url: str,
+async def analyze_media(
+    media_bytes: bytes,
     media_type: str,
     text_context: Optional[str] = None
-) -> Optional[Message]:
+) -> Optional[tuple[str, str]]:
     """
-    Process media (image or video), analyze it with Gemini, and store description.
+    Analyze already-fetched media (image or video) with Gemini.
+
+    Runs before any DB session is opened, so no pooled connection is held
+    during the model call.
 
     Args:
-        db: Database session
-        user: User object
-        media_url: URL to the media file
+        media_bytes: Raw media content (see fetch_media_bytes)
         media_type: MIME type of the media
         text_context: Optional text message sent with the media
 
     Returns:
-        Message object if successful, None otherwise
+        (content, content_type) to store for the message, or None on failure
     """
     try:
-        print(f"📎 Processing {media_type}")
-
-        # Fetch media bytes
-        media_bytes = await fetch_media_bytes(media_url)
-        if not media_bytes:
-            print(f"❌ Failed to fetch media bytes from {media_url}")
-            return None
+        logger.info("📎 Processing %s", media_type)
 
         # Analyze based on type
         if media_type.startswith("image/"):
-            print(f"🖼️  Analyzing image with Gemini...")
+            logger.info("🖼️  Analyzing image with Gemini...")
             analysis = await analyze_image(media_bytes, text=text_context)
             if analysis:
-                content = f"<image>{analysis}</image>"
-                # Convert image bytes to base64
-                image_base64 = base64.b64encode(media_bytes).decode('utf-8')
-                print(f"💾 Storing image analysis: {analysis[:100]}...")
-                print(f"📸 Storing image as base64 ({len(image_base64)} chars)")
-                message = await store_message(
-                    db, user, content, "image",
-                    is_from_user=True,
-                    image_data=image_base64
-                )
-                print(f"✅ Stored image analysis with base64 data")
-                return message
+                logger.debug("💾 Image analysis: %s...", analysis[:100])
+                return f"<image>{analysis}</image>", "image"
             else:
-                print(f"❌ Gemini analysis returned None")
+                logger.error("❌ Gemini analysis returned None")
                 return None
 
         elif media_type.startswith("video/"):
-            print(f"🎥 Analyzing video with Gemini...")
+            logger.info("🎥 Analyzing video with Gemini...")
             analysis = await analyze_video(media_bytes)
             if analysis:
-                content = f"<video>{analysis}</video>"
-                print(f"💾 Storing video analysis: {analysis[:100]}...")
-                message = await store_message(db, user, content, "video", is_from_user=True)
-                print(f"✅ Stored video analysis")
-                return message
+                logger.debug("💾 Video analysis: %s...", analysis[:100])
+                return f"<video>{analysis}</video>", "video"
             else:
-                print(f"❌ Gemini video analysis returned None")
+                logger.error("❌ Gemini video analysis returned None")
                 return None
         else:
-            print(f"❌ Unsupported media type: {media_type}")
+            logger.error("❌ Unsupported media type: %s", media_type)
             return None
 
     except Exception as e:
-        print(f"❌ Error processing media: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error processing media: %s", e)
         return None
 
 
+async def ingest_and_respond(
+    phone_number: str,
+    body: str,
+    media_url: Optional[str],
+    media_type: Optional[str]
+):
+    """
+    Background task: store the user's message(s), then analyze and reply.
+
+    Runs after the webhook has already returned to Twilio. The media download
+    and Gemini analysis happen first, outside any DB session; the user lookup
+    and message writes then share one short transaction.
+
+    Args:
+        phone_number: Sender in WhatsApp format (whatsapp:+1234567890)
+        body: Message text (may be empty)
+        media_url: URL of the first media attachment, if any
+        media_type: MIME type of the first media attachment, if any
+    """
+    has_text = bool(body and body.strip())
+
+    try:
+        # Process media if present (images and videos get analyzed by Gemini)
+        media_bytes = None
+        media = None
+        if media_url:
+            media_bytes = await fetch_media_bytes(media_url)
+            if not media_bytes:
+                logger.error("❌ Failed to fetch media bytes from %s", media_url)
+            else:
+                logger.info("🔄 Starting media processing...")
+                media = await analyze_media(
+                    media_bytes,
+                    media_type or "application/octet-stream",
+                    text_context=body if has_text else None
+                )
+                if media:
+                    logger.info("✅ Media processed successfully")
+                else:
+                    logger.error("❌ Media processing returned None")
+
+        # Nothing new to store: say so rather than re-analyzing the previous
+        # history, which would repeat (or re-submit) the last answer
+        if not has_text and not media:
+            await send_whatsapp_message(phone_number, MEDIA_FAILED_RESPONSE)
+            return
+
+        async with async_session_maker() as db:
+            user_id = await get_or_create_user(db, phone_number)
+
+            # Store text message if present
+            if has_text:
+                await store_message(db, user_id, body, "text", is_from_user=True, commit=False)
+                logger.info("✅ Added text message from user")
+
+            media_message = None
+            if media:
+                content, content_type = media
+                media_message = await store_message(
+                    db, user_id, content, content_type,
+                    is_from_user=True,
+                    image_data=media_bytes if content_type == "image" else None,
+                    commit=False
+                )
+
+            # New user, text and media messages are written in a single transaction
+            await db.commit()
+            logger.info("✅ Stored user message(s)")
+
+        # The bytes are already in hand, so a submit this turn skips the DB read
+        if media_message is not None and media_message.content_type == "image":
+            cache_message_image(media_message.id, media_bytes)
+
+    except Exception as e:
+        logger.exception("❌ Error storing incoming message: %s", e)
+        return
+
+    await process_message_background(user_id, phone_number)
+
+
 @router.post('/webhook')
 async def twilio_webhook(
     background_tasks: BackgroundTasks,
@@ -234,66 +358,51 @@ async def twilio_webhook(
     MessageSid: str = Form(...),
     NumMedia: int = Form(default=0),
     MediaUrl0: Optional[str] = Form(default=None),
-    MediaContentType0: Optional[str] = Form(default=None),
-    db: AsyncSession = Depends(get_db)
+    MediaContentType0: Optional[str] = Form(default=None)
 ):
     """
     Main webhook endpoint for incoming WhatsApp messages.
 
-    This endpoint responds immediately to Twilio (within 15 seconds) and processes
-    the message in the background to avoid timeout issues.
+    This endpoint responds to Twilio immediately, without touching the database
+    or any AI service, so it can never run into Twilio's 15 second timeout.
 
     Flow:
-    1. Store user's message (text/image/video) immediately
-    2. Return 200 OK to Twilio
+    1. Return 200 OK (with an acknowledgment) to Twilio
+    2. Store user's message (text/image/video) in background
     3. Process message analysis in background
     4. Send response via Twilio API when ready
     """
     try:
-        print(f'📨 Incoming message from {From}')
-        print(f'📊 NumMedia: {NumMedia}, Body: "{Body}"')
+        logger.info('📨 Incoming message from %s', From)
+        logger.debug('📊 NumMedia: %s, Body: "%s"', NumMedia, Body)
         if NumMedia > 0:
-            print(f'📎 MediaUrl0: {MediaUrl0}')
-            print(f'📎 MediaContentType0: {MediaContentType0}')
-
-        # Get or create user
-        user = await get_or_create_user(db, From)
-
-        # Store text message if present
-        if Body and Body.strip():
-            await store_message(db, user, Body, "text", is_from_user=True)
-            print(f"✅ Stored text message from user")
-
-        # Process media if present (images and videos get analyzed by Gemini)
-        if NumMedia > 0 and MediaUrl0:
-            print(f"🔄 Starting media processing...")
-            result = await process_and_store_media(
-                db=db,
-                user=user,
-                media_url=MediaUrl0,
-                media_type=MediaContentType0 or "application/octet-stream",
-                text_context=Body if Body and Body.strip() else None
-            )
-            if result:
-                print(f"✅ Media processed successfully: {result.id}")
-            else:
-                print(f"❌ Media processing returned None")
-
-        # Send immediate acknowledgment to user
-        twiml = MessagingResponse()
-        twiml.message("Processing your request...")
-
-        # Add background task to process message and send response
-        background_tasks.add_task(process_message_background, user.id, From)
-        print(f"⏰ Background task scheduled for {From}")
+            logger.debug('📎 MediaUrl0: %s', MediaUrl0)
+            logger.debug('📎 MediaContentType0: %s', MediaContentType0)
+
+        has_text = bool(Body and Body.strip())
+        has_media = NumMedia > 0 and bool(MediaUrl0)
+
+        # Nothing to store or analyze (e.g. a misrouted status ping): skip the
+        # DB and LLM entirely
+        if not has_text and not has_media:
+            logger.info('⏭️  Empty message from %s, nothing to process', From)
+            return Response(content='', status_code=200)
+
+        # All DB, Gemini and Dedalus work happens after the response is sent
+        background_tasks.add_task(
+            ingest_and_respond,
+            From,
+            Body,
+            MediaUrl0 if has_media else None,
+            MediaContentType0
+        )
+        logger.info("⏰ Background task scheduled for %s", From)
 
-        # Return TwiML response with acknowledgment message
-        return Response(content=str(twiml), media_type='text/xml')
+        # Return TwiML response with immediate acknowledgment message
+        return Response(content=PROCESSING_TWIML, media_type='text/xml')
 
     except Exception as error:
-        print(f'❌ Error processing webhook: {error}')
-        import traceback
-        traceback.print_exc()
+        logger.exception('❌ Error processing webhook: %s', error)
 
         # Still return 200 to Twilio to avoid retries
         return Response(content='', status_code=200)
@@ -311,5 +420,5 @@ async def twilio_status(
         MessageStatus: Current status of the message
         MessageSid: Twilio message identifier
     """
-    print(f'📊 Message {MessageSid} status: {MessageStatus}')
+    logger.debug('📊 Message %s status: %s', MessageSid, MessageStatus)
     return {'status': 'ok'}
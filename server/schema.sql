@@ -6,7 +6,7 @@ CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE TABLE users (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     phone_number VARCHAR(100) UNIQUE NOT NULL,
-    created_at TIMESTAMP DEFAULT NOW()
+    created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
 CREATE TABLE messages (
@@ -14,8 +14,11 @@ CREATE TABLE messages (
     user_id UUID REFERENCES users(id) ON DELETE CASCADE,
     content TEXT NOT NULL,
     content_type VARCHAR(50) NOT NULL,  -- 'text', 'image', 'video'
-    timestamp TIMESTAMP DEFAULT NOW()
+    is_from_user BOOLEAN NOT NULL DEFAULT TRUE,
+    image_data BYTEA,  -- raw image bytes
+    timestamp TIMESTAMPTZ DEFAULT clock_timestamp()
 );
 
 -- Index for fast lookups
-CREATE INDEX idx_messages_user_id ON messages(user_id, timestamp DESC);
+CREATE INDEX ix_messages_user_ts ON messages(user_id, timestamp DESC);
+CREATE INDEX ix_messages_timestamp_brin ON messages USING brin(timestamp);
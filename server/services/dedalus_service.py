@@ -1,76 +1,448 @@
 """Dedalus AI service for conversation analysis."""
 import asyncio
-import json
+import functools
+import logging
 import os
+import re
 from typing import Optional
-import requests
+from uuid import UUID
 
+import httpx
+import orjson
 from dedalus_labs import AsyncDedalus, DedalusRunner
 
 try:
     from server.config import config
+    from server.database import async_session_maker, get_message_image
+    from server.services.gemini import sniff_image_mime
+    from server.services.http_client import get_http_client
+    from server.services.parsing import parse_json_reply
+    from server.services.prompts import DEDALUS_SYSTEM_PROMPT, get_dedalus_analysis_prompt
+    from server.services.report_matcher import SUBMITTED_RESPONSE, match_complete_report, was_submitted
+    from server.services.response_cache import cache_get, cache_put, coalesced, make_cache_key, normalize_text
+    from server.services.retry import RETRYABLE_STATUS_CODES, sleep_backoff
 except ModuleNotFoundError:
     from config import config
-
-
-def submit_sf311_form(form_url: str, description: str, image_base64: str = "") -> str:
+    from database import async_session_maker, get_message_image
+    from services.gemini import sniff_image_mime
+    from services.http_client import get_http_client
+    from services.parsing import parse_json_reply
+    from services.prompts import DEDALUS_SYSTEM_PROMPT, get_dedalus_analysis_prompt
+    from services.report_matcher import SUBMITTED_RESPONSE, match_complete_report, was_submitted
+    from services.response_cache import cache_get, cache_put, coalesced, make_cache_key, normalize_text
+    from services.retry import RETRYABLE_STATUS_CODES, sleep_backoff
+
+logger = logging.getLogger(__name__)
+
+# Use localhost for graffiti automation service
+# For production, set this to the deployed graffiti-automation service URL
+GRAFFITI_API_URL = os.getenv("GRAFFITI_API_URL", "http://localhost:3002/api/submit")
+
+# The form service drives a browser, so reads are slow but connects should not be
+SF311_SUBMIT_TIMEOUT = httpx.Timeout(
+    connect=5.0, read=config.SF311_SUBMIT_TIMEOUT_SECONDS, write=10.0, pool=5.0
+)
+
+DEDALUS_MODEL = "openai/gpt-5"
+
+# Caps concurrent Dedalus calls. Held per attempt, not across retries and
+# backoff, so one struggling analysis can't starve every other conversation
+_dedalus_semaphore = asyncio.Semaphore(config.DEDALUS_CONCURRENCY)
+
+# The reply is a small fixed JSON object, but GPT-5 reasoning tokens count
+# against the cap too, so it leaves headroom above the ~250 visible tokens.
+# temperature is not set: GPT-5 only accepts the default.
+DEDALUS_MAX_OUTPUT_TOKENS = 2048
+
+# Native structured output: the chat completion returns bare JSON matching
+# this schema, with no fences or prose to strip
+DEDALUS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "sf311_analysis",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "reporting": {"type": ["string", "null"]},
+                "location": {"type": ["string", "null"]},
+                "needs_clarification": {"type": "boolean"},
+                "clarification_question": {"type": ["string", "null"]},
+                "response_message": {"type": "string"},
+                "new_report": {"type": "boolean"},
+            },
+            "required": [
+                "reporting", "location", "needs_clarification",
+                "clarification_question", "response_message", "new_report"
+            ],
+            "additionalProperties": False,
+        },
+    },
+}
+
+# Failures where the form request never reached the service, so a retry
+# cannot file a duplicate report
+_UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+async def submit_sf311_form(form_url: str, description: str, image_data: Optional[bytes] = None) -> dict:
     """
     Submit a SF 311 service request form.
 
     Args:
         form_url: The SF 311 form URL (e.g., "https://sanfrancisco.form.us.empro.verintcloudservices.com/form/auto/pw_graffiti")
         description: Description of the issue including location and details
-        image_base64: Base64 encoded image data (optional)
+        image_data: Raw image bytes (optional)
 
     Returns:
-        JSON string with submission result
+        Submission result from the form service, or {"error": ...} on failure
     """
     try:
-        print(f"🔧 Tool called: submit_sf311_form")
-        print(f"   form_url: {form_url}")
-        print(f"   description: {description}")
-        print(f"   image_base64: {'Yes (' + str(len(image_base64)) + ' chars)' if image_base64 else 'No'}")
-
-        # Use localhost for graffiti automation service
-        # For production, update this to the deployed graffiti-automation service URL
-        api_url = os.getenv("GRAFFITI_API_URL", "http://localhost:3002/api/submit")
-        payload = {
+        logger.info("🔧 Submitting SF 311 form %s (image: %s bytes)", form_url, len(image_data) if image_data else 0)
+        logger.debug("   description: %s", description)
+
+        fields = {
             "formUrl": form_url,
             "description": description
         }
 
-        # Add image if provided
-        if image_base64:
-            payload["imageBase64"] = image_base64
+        if image_data:
+            # Send the image as the raw body (fields in the query string) rather
+            # than base64 in JSON: 33% fewer bytes and no encode/decode passes
+            request_kwargs = {
+                "params": fields,
+                "content": image_data,
+                # WhatsApp photos are JPEG when the format isn't recognized
+                "headers": {"Content-Type": sniff_image_mime(image_data) or "image/jpeg"}
+            }
+        else:
+            request_kwargs = {
+                "content": orjson.dumps(fields),
+                "headers": {"Content-Type": "application/json"}
+            }
 
-        response = requests.post(
-            api_url,
-            headers={"Content-Type": "application/json"},
-            json=payload,
-            timeout=30
-        )
+        for attempt in range(config.MAX_RETRIES):
+            last_attempt = attempt == config.MAX_RETRIES - 1
+            try:
+                # Non-blocking post on the shared pooled client
+                response = await get_http_client().post(
+                    GRAFFITI_API_URL,
+                    timeout=SF311_SUBMIT_TIMEOUT,
+                    **request_kwargs
+                )
+            except _UNSENT_ERRORS as e:
+                if last_attempt:
+                    raise
+                logger.warning("⚠️  Form service unreachable (%s), retrying...", type(e).__name__)
+                await sleep_backoff(attempt)
+                continue
+
+            if response.status_code in RETRYABLE_STATUS_CODES and not last_attempt:
+                logger.warning("⚠️  Form service returned %s, retrying...", response.status_code)
+                await sleep_backoff(attempt)
+                continue
+            break
 
         if response.status_code == 200:
-            result = response.json()
-            print(f"✅ Form submitted successfully: {result}")
-            return json.dumps(result)
+            result = orjson.loads(response.content)
+            logger.info("✅ Form submitted successfully: %s", result)
+            return result
         else:
             error_msg = f"Form submission failed with status {response.status_code}: {response.text}"
-            print(f"❌ {error_msg}")
-            return json.dumps({"error": error_msg})
+            logger.error("❌ %s", error_msg)
+            return {"error": error_msg}
 
     except Exception as e:
         error_msg = f"Error submitting form: {str(e)}"
-        print(f"❌ {error_msg}")
-        return json.dumps({"error": error_msg})
+        logger.exception("❌ %s", error_msg)
+        return {"error": error_msg}
+
+
+@functools.lru_cache(maxsize=1)
+def get_dedalus_runner() -> DedalusRunner:
+    """
+    Return the shared Dedalus runner, built on first use.
+
+    One AsyncDedalus client means its connection pool (and warm TLS
+    connections) is reused across analyses instead of rebuilt per call.
+    """
+    # Key passed explicitly rather than via a process-wide os.environ write
+    return DedalusRunner(AsyncDedalus(api_key=config.DEDALUS_API_KEY))
+
+
+# SF 311 form for each supported issue type, matched against "reporting"
+FORM_URLS = {
+    "graffiti": "https://sanfrancisco.form.us.empro.verintcloudservices.com/form/auto/pw_graffiti",
+    "pothole": "https://sanfrancisco.form.us.empro.verintcloudservices.com/form/auto/pw_pothole",
+    "illegal dumping": "https://sanfrancisco.form.us.empro.verintcloudservices.com/form/auto/pw_illegaldumping",
+}
+
+UNSUPPORTED_ISSUE_RESPONSE = "Thanks for the details! I can currently file graffiti, pothole, and illegal dumping reports with SF 311, so I wasn't able to submit this one."
+SUBMIT_FAILED_RESPONSE = "Sorry, I couldn't submit your report to SF 311 right now. Please try again in a few minutes."
+ALREADY_SUBMITTED_RESPONSE = "Your report for {reporting} at {location} has already been submitted to SF 311. Let me know if there's anything else you'd like to report."
+
+
+def get_form_url(reporting: Optional[str]) -> Optional[str]:
+    """Return the SF 311 form URL for a reported issue, or None if unsupported."""
+    reporting = (reporting or "").lower()
+    for issue_type, form_url in FORM_URLS.items():
+        if issue_type in reporting:
+            return form_url
+    return None
+
+
+def should_submit(result: dict, messages: list[dict]) -> bool:
+    """
+    Return True if an analysis is a new, complete report that hasn't been filed yet.
+
+    The model has to flag it as a new report, so follow-ups on a filed report
+    ("how long will that take?") never submit it again; an assistant reply in
+    the history confirming this report vetoes it as well.
+    """
+    if result.get("needs_clarification") is not False or not result.get("reporting") or not result.get("location"):
+        return False
+    if was_submitted(messages, result["reporting"], result["location"]):
+        logger.info("⏭️  %s at %s was already submitted, not resubmitting",
+                    result["reporting"], result["location"])
+        if result.get("new_report"):
+            result["response_message"] = ALREADY_SUBMITTED_RESPONSE.format(
+                reporting=result["reporting"], location=result["location"]
+            )
+        return False
+    return result.get("new_report") is True
+
+
+async def submit_report(result: dict, image_ref: Optional[UUID], user_id: Optional[UUID] = None) -> dict:
+    """
+    Submit a complete analysis to SF 311 and fix up the reply.
+
+    The model only extracts the report; whether and where to submit is
+    decided here so a completed report costs a single LLM turn. image_ref is
+    the id of the message holding the photo; its bytes are loaded only now.
+
+    With a user_id, each user's report (by issue and location) is filed at
+    most once per cache TTL, so redelivered or concurrent duplicate messages
+    share one submission.
+    """
+    form_url = get_form_url(result.get("reporting"))
+    if form_url is None:
+        logger.warning("⚠️  No SF 311 form for %r, not submitting", result.get("reporting"))
+        result["response_message"] = UNSUPPORTED_ISSUE_RESPONSE
+        return result
+
+    reporting, location = result["reporting"], result["location"]
+    submitted_key = None
+    if user_id is not None:
+        submitted_key = make_cache_key(
+            "sf311-submitted", str(user_id), normalize_text(reporting), normalize_text(location)
+        )
+        if cache_get(submitted_key):
+            logger.info("⏭️  %s at %s was already submitted for this user", reporting, location)
+            result["response_message"] = ALREADY_SUBMITTED_RESPONSE.format(reporting=reporting, location=location)
+            return result
+
+    async def file_report() -> dict:
+        image_data = None
+        if image_ref is not None:
+            async with async_session_maker() as db:
+                image_data = await get_message_image(db, image_ref)
+
+        submission = await submit_sf311_form(form_url, f"{reporting} at {location}", image_data)
+        if submitted_key is not None and "error" not in submission:
+            cache_put(submitted_key, True)
+        return submission
+
+    if submitted_key is None:
+        submission = await file_report()
+    else:
+        submission = await coalesced(submitted_key, file_report)
+
+    if "error" in submission:
+        result["response_message"] = SUBMIT_FAILED_RESPONSE
+    else:
+        # Canonical wording: later turns recognize it (see was_submitted)
+        result["response_message"] = SUBMITTED_RESPONSE.format(reporting=reporting, location=location)
+    return result
+
+
+# Latest-message patterns that never need the LLM: thanks/acks, greetings,
+# and emoji/punctuation-only messages
+_ACK_RE = re.compile(
+    r"^(thanks?( you)?( so much)?|thank u|thx|ty|ok(ay)?|k|kk|cool|great|awesome|"
+    r"perfect|got it|sounds good|will do|no problem|np)\W*$",
+    re.IGNORECASE
+)
+_GREETING_RE = re.compile(
+    r"^(hi|hello|hey|hiya|yo|howdy|good (morning|afternoon|evening))( there)?\W*$",
+    re.IGNORECASE
+)
+_NO_WORDS_RE = re.compile(r"^[\W_]*$")
+
+ACK_RESPONSE = "You're welcome! If you see another issue, just send me a description and location (a photo helps too)."
+GREETING_RESPONSE = "Hi! I can help you report issues to SF 311. Tell me what you're seeing and where it is, and feel free to include a photo."
+
+
+def get_direct_response(messages: list[dict]) -> Optional[dict]:
+    """
+    Return a canned analysis when the latest message is trivial chatter, or None.
+
+    Only a plain text message from the user is considered; anything that could
+    carry report details (media, or text with real content) goes to the LLM.
+    """
+    if not messages:
+        return None
+
+    latest = messages[-1]
+    if not latest.get("is_from_user") or latest.get("content_type") != "text":
+        return None
+
+    content = (latest.get("content") or "").strip()
+    if _GREETING_RE.match(content):
+        response_message = GREETING_RESPONSE
+    elif _ACK_RE.match(content) or _NO_WORDS_RE.match(content):
+        response_message = ACK_RESPONSE
+    else:
+        return None
+
+    return {
+        "reporting": None,
+        "location": None,
+        "needs_clarification": True,
+        "clarification_question": None,
+        "response_message": response_message
+    }
+
 
+FAST_PATH_CONFIRM_RESPONSE = "Got it: {reporting} at {location}. Reply YES and I'll submit it to SF 311."
 
-async def analyze_conversation_with_dedalus(messages: list[dict]) -> dict:
+# Plain confirmations of a fast-path report
+_AFFIRMATIVE_RE = re.compile(
+    r"^(yes|y|yep|yeah|yup|sure|ok(ay)?|confirm(ed)?|correct|go ahead|do it|please do|submit( it)?)"
+    r"( please)?\W*$",
+    re.IGNORECASE
+)
+
+
+def get_fast_path_report(messages: list[dict]) -> Optional[dict]:
+    """
+    Return a confirmation request for a regex-matched report, or None (see match_complete_report).
+
+    Nothing is submitted on a regex match alone; the user has to confirm it
+    first (see get_confirmed_report).
+    """
+    match = match_complete_report(messages)
+    if match is None:
+        return None
+
+    reporting, location = match
+    return {
+        "reporting": reporting,
+        "location": location,
+        "needs_clarification": True,
+        "clarification_question": FAST_PATH_CONFIRM_RESPONSE.format(reporting=reporting, location=location),
+        "response_message": FAST_PATH_CONFIRM_RESPONSE.format(reporting=reporting, location=location),
+        "new_report": False
+    }
+
+
+def get_confirmed_report(messages: list[dict]) -> Optional[dict]:
+    """
+    Return a complete analysis when the user just said yes to a fast-path
+    confirmation request, or None.
+
+    The report is matched again from the messages before the request, so it
+    only counts if the stored reply is exactly the confirmation for it.
+    """
+    if len(messages) < 2:
+        return None
+
+    confirmation, latest = messages[-2], messages[-1]
+    if (confirmation.get("is_from_user") or not latest.get("is_from_user")
+            or latest.get("content_type") != "text"
+            or not _AFFIRMATIVE_RE.match((latest.get("content") or "").strip())):
+        return None
+
+    match = match_complete_report(messages[:-2])
+    if match is None:
+        return None
+
+    reporting, location = match
+    if confirmation.get("content") != FAST_PATH_CONFIRM_RESPONSE.format(reporting=reporting, location=location):
+        return None
+
+    return {
+        "reporting": reporting,
+        "location": location,
+        "needs_clarification": False,
+        "clarification_question": None,
+        "response_message": SUBMITTED_RESPONSE.format(reporting=reporting, location=location),
+        "new_report": True
+    }
+
+
+def format_conversation(messages: list[dict]) -> str:
+    """Render messages as "USER: ..." / "ASSISTANT: ..." lines."""
+    return "\n".join(
+        ("USER: " if msg.get("is_from_user") else "ASSISTANT: ") + (msg.get("content") or "")
+        for msg in messages
+    )
+
+
+async def _run_dedalus(prompt: str, cache_key: str) -> Optional[dict]:
+    """
+    Run the Dedalus analysis, retrying timeouts and transport errors.
+
+    Returns the parsed reply (also cached under cache_key), or None if every
+    attempt failed. Any other runner error is raised.
+    """
+    runner = get_dedalus_runner()
+
+    response = None
+    for attempt in range(config.MAX_RETRIES):
+        try:
+            logger.debug("📞 Starting Dedalus runner.run() (attempt %s/%s)...", attempt + 1, config.MAX_RETRIES)
+            async with _dedalus_semaphore:
+                response = await asyncio.wait_for(
+                    runner.run(
+                        input=prompt,
+                        instructions=DEDALUS_SYSTEM_PROMPT,
+                        model=DEDALUS_MODEL,
+                        max_tokens=DEDALUS_MAX_OUTPUT_TOKENS,
+                        response_format=DEDALUS_RESPONSE_FORMAT
+                    ),
+                    timeout=config.DEDALUS_TIMEOUT_SECONDS
+                )
+            break
+        except (asyncio.TimeoutError, httpx.TransportError) as e:
+            reason = "timed out" if isinstance(e, asyncio.TimeoutError) else f"transport error: {e}"
+            logger.warning("❌ Dedalus %s (attempt %s/%s)", reason, attempt + 1, config.MAX_RETRIES)
+            if attempt == config.MAX_RETRIES - 1:
+                break
+            await sleep_backoff(attempt)
+
+    if response is None:
+        logger.error("❌ Dedalus failed after %s attempts (API key, model or network problem?)", config.MAX_RETRIES)
+        return None
+
+    logger.info("✅ Dedalus runner completed successfully")
+    result_text = response.final_output.strip()
+    logger.debug("📝 Dedalus raw response: %.200s...", result_text)
+
+    # JSON mode returns bare JSON, so this normally takes the direct-parse path
+    result = parse_json_reply(result_text)
+    logger.debug("💬 Dedalus conversation analysis: %s", result)
+    cache_put(cache_key, result)
+    return result
+
+
+async def analyze_conversation_with_dedalus(messages: list[dict], user_id: Optional[UUID] = None) -> dict:
     """
     Analyze conversation history using Dedalus to extract what's being reported and where.
 
     Args:
-        messages: List of message dicts with 'content', 'is_from_user', and 'content_type'
+        messages: List of message dicts with 'id', 'content', 'is_from_user',
+            'content_type' and 'has_image'
+        user_id: Owner of the conversation, used to file each report only once
 
     Returns:
         Dict with:
@@ -79,170 +451,88 @@ async def analyze_conversation_with_dedalus(messages: list[dict]) -> dict:
         - needs_clarification: Boolean - true if more info needed
         - clarification_question: Question to ask user if needs_clarification is true
         - response_message: Message to send back to user
+        - new_report: Boolean - true if this turn completes a report not yet submitted
     """
-    try:
-        # Set the API key in the environment (Dedalus SDK reads from DEDALUS_API_KEY)
-        os.environ['DEDALUS_API_KEY'] = config.DEDALUS_API_KEY
-
-        # Build conversation history and extract the most recent image
-        conversation = []
-        latest_image_base64 = None
-
-        for msg in messages:
-            role = "user" if msg.get("is_from_user") else "assistant"
-            content = msg.get("content", "")
-            conversation.append(f"{role.upper()}: {content}")
-
-            # Keep track of the latest image from user
-            if msg.get("is_from_user") and msg.get("image_data"):
-                latest_image_base64 = msg.get("image_data")
-                print(f"📸 Found image in conversation ({len(latest_image_base64)} chars)")
-
-        conversation_text = "\n".join(conversation)
-
-        # Create the prompt for Dedalus
-        prompt = f"""You are a helpful assistant for SF 311 service requests. Your job is to understand what issue the user is reporting and where it's located.
-
-You have access to a tool called `submit_sf311_form` that can submit SF 311 requests.
-
-IMPORTANT: When BOTH the issue type and location are clear and complete, you MUST use the `submit_sf311_form` tool to submit the request.
-
-Form URLs for different issue types:
-- Graffiti: https://sanfrancisco.form.us.empro.verintcloudservices.com/form/auto/pw_graffiti
-- Pothole: https://sanfrancisco.form.us.empro.verintcloudservices.com/form/auto/pw_pothole
-- Illegal dumping: https://sanfrancisco.form.us.empro.verintcloudservices.com/form/auto/pw_illegaldumping
-
-Analyze the following conversation and extract:
-1. **reporting**: What is being reported (e.g., "broken pothole", "graffiti", "illegal dumping")
-2. **location**: Where is it located (full address if possible, e.g., "1160 Mission Street, San Francisco")
-
-If BOTH reporting and location are clear:
-- Use the submit_sf311_form tool with the appropriate form URL and a description combining the issue and location
-- Set needs_clarification to false
-- Provide a confirmation message
-
-If EITHER is unclear or missing:
-- Set needs_clarification to true
-- Ask specifically for what's missing
-
-CONVERSATION HISTORY:
-{conversation_text}
-
-After analyzing (and submitting if appropriate), respond with ONLY valid JSON in this exact format:
-{{
-    "reporting": "what is being reported or null if unclear",
-    "location": "where it is located or null if unclear",
-    "needs_clarification": true/false,
-    "clarification_question": "question to ask if needs_clarification is true, otherwise null",
-    "response_message": "friendly message to send to the user"
-}}
-
-Examples:
-
-If user says "there's a pothole on mission street":
-{{
-    "reporting": "pothole",
-    "location": "Mission Street",
-    "needs_clarification": true,
-    "clarification_question": "Can you provide the exact address or cross streets for the pothole on Mission Street?",
-    "response_message": "I understand there's a pothole on Mission Street. Can you provide the exact address or cross streets so I can submit this to SF 311?"
-}}
-
-If user says "broken pothole at 1160 mission street":
- respond with:
-{{
-    "reporting": "pothole",
-    "location": "1160 Mission Street",
-    "needs_clarification": false,
-    "clarification_question": null,
-    "response_message": "Perfect! I've submitted your report for a pothole at 1160 Mission Street to SF 311. You should receive a case number shortly."
-}}
-then call the submit_sf311_form tool with the appropriate form URL and description"""
-
-        # Add image context if available
-        if latest_image_base64:
-            prompt += """
-
-IMPORTANT: An image is available in the conversation. When you call submit_sf311_form, the image will be automatically included.
-"""
-
-        prompt += """
-
-Now analyze the conversation above, use tools if appropriate, and respond with JSON only:"""
-
-        # Initialize Dedalus client and runner
-        client = AsyncDedalus()
-        runner = DedalusRunner(client)
-
-        # Create a wrapper function that includes the image
-        def submit_with_image(form_url: str, description: str) -> str:
-            """Submit SF311 form with image if available."""
-            return submit_sf311_form(form_url, description, latest_image_base64 or "")
-
-        # Run the analysis using Dedalus with GPT-5 and the SF311 submission tool
-        print(f"🤖 Analyzing conversation with Dedalus (with SF311 submission tool)...")
-        print(f"📸 Image available: {bool(latest_image_base64)}")
-        if latest_image_base64:
-            print(f"📸 Image size: {len(latest_image_base64)} chars")
-
-        print(f"🔑 DEDALUS_API_KEY set: {bool(config.DEDALUS_API_KEY)}")
-        print(f"🔑 DEDALUS_API_KEY length: {len(config.DEDALUS_API_KEY) if config.DEDALUS_API_KEY else 0}")
+    # Checked before the direct responses, since "ok" is also an acknowledgment
+    confirmed = get_confirmed_report(messages)
 
-        try:
-            print(f"📞 Starting Dedalus runner.run()...")
-            import asyncio
-            response = await asyncio.wait_for(
-                runner.run(
-                    input=prompt,
-                    model="openai/gpt-5",
-                    tools=[submit_with_image]
-                ),
-                timeout=60.0  # Increased to 60 second timeout
-            )
+    # Greetings and acknowledgments get a canned reply without an LLM round-trip
+    direct = None if confirmed else get_direct_response(messages)
+    if direct is not None:
+        logger.info("⚡ Direct response, skipping Dedalus")
+        return direct
 
-            print(f"✅ Dedalus runner completed successfully")
-            result_text = response.final_output.strip()
-            print(f"📝 Dedalus raw response: {result_text[:200]}...")
-        except asyncio.TimeoutError:
-            print(f"❌ Dedalus timed out after 60 seconds")
-            print(f"⚠️  This may indicate: API key issues, model issues, or network problems")
-            # Return a fallback response
-            return {
-                "reporting": None,
-                "location": None,
-                "needs_clarification": True,
-                "clarification_question": "I'm having trouble processing your request. Can you describe what issue you'd like to report?",
-                "response_message": "I'm having trouble processing your request. Can you describe what issue you'd like to report and where it's located?"
-            }
-        except Exception as e:
-            print(f"❌ Dedalus runner error: {type(e).__name__}: {e}")
-            import traceback
-            print(f"📋 Full traceback:")
-            traceback.print_exc()
-            # Return fallback instead of crashing
-            return {
-                "reporting": None,
-                "location": None,
-                "needs_clarification": True,
-                "clarification_question": "I encountered an error. Can you describe what you'd like to report?",
-                "response_message": "I encountered an error processing your message. Can you tell me what issue you'd like to report and where it's located?"
-            }
-
-        # Try to extract JSON from response
-        # Sometimes the model wraps it in ```json blocks
-        if "```json" in result_text:
-            result_text = result_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in result_text:
-            result_text = result_text.split("```")[1].split("```")[0].strip()
+    try:
+        # Most recent user image, scanning from the end (by message id; the
+        # bytes are only loaded if a report is actually submitted)
+        latest_image_ref = next(
+            (msg.get("id") for msg in reversed(messages)
+             if msg.get("is_from_user") and msg.get("has_image")),
+            None
+        )
 
-        result = json.loads(result_text)
-        print(f"💬 Dedalus conversation analysis: {result}")
+        if confirmed is not None:
+            logger.info("⚡ Fast-path report confirmed, submitting: %s at %s",
+                        confirmed["reporting"], confirmed["location"])
+            return await submit_report(confirmed, latest_image_ref, user_id)
+
+        # Obviously complete reports are confirmed with the user without a
+        # GPT-5 round-trip; the report is only submitted once they say yes
+        fast_path = get_fast_path_report(messages)
+        if fast_path is not None:
+            logger.info("⚡ Complete report matched, skipping Dedalus: %s at %s",
+                        fast_path["reporting"], fast_path["location"])
+            return fast_path
+
+        conversation_text = format_conversation(messages)
+
+        # Only the conversation varies; the static part goes in as instructions
+        prompt = get_dedalus_analysis_prompt(conversation_text, has_image=latest_image_ref is not None)
+
+        # Identical or trivially reworded conversations (retries, "help",
+        # repeated spam, "St" vs "Street") skip Dedalus, and concurrent ones
+        # share a single call. Only the extraction is cached; should_submit
+        # and submit_report's per-user record keep a hit from filing twice.
+        cache_key = make_cache_key(
+            DEDALUS_MODEL, str(latest_image_ref is not None), normalize_text(conversation_text)
+        )
+        result = cache_get(cache_key)
+        if result is not None:
+            logger.debug("💬 Dedalus conversation analysis (cached): %s", result)
+        else:
+            # Run the analysis using Dedalus with GPT-5 (extraction only, no tools)
+            logger.info("🤖 Analyzing conversation with Dedalus (image available: %s)...", latest_image_ref is not None)
+            try:
+                result = await coalesced(cache_key, lambda: _run_dedalus(prompt, cache_key))
+            except Exception as e:
+                logger.exception("❌ Dedalus runner error: %s: %s", type(e).__name__, e)
+                # Return fallback instead of crashing
+                return {
+                    "reporting": None,
+                    "location": None,
+                    "needs_clarification": True,
+                    "clarification_question": "I encountered an error. Can you describe what you'd like to report?",
+                    "response_message": "I encountered an error processing your message. Can you tell me what issue you'd like to report and where it's located?"
+                }
+
+            if result is None:
+                # Return a fallback response
+                return {
+                    "reporting": None,
+                    "location": None,
+                    "needs_clarification": True,
+                    "clarification_question": "I'm having trouble processing your request. Can you describe what issue you'd like to report?",
+                    "response_message": "I'm having trouble processing your request. Can you describe what issue you'd like to report and where it's located?"
+                }
+            # Coalesced callers share one dict and submit_report edits it
+            result = dict(result)
+
+        if should_submit(result, messages):
+            result = await submit_report(result, latest_image_ref, user_id)
         return result
 
     except Exception as e:
-        print(f"❌ Error in analyze_conversation_with_dedalus: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in analyze_conversation_with_dedalus: %s", e)
         # Return a fallback response
         return {
             "reporting": None,
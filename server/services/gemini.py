@@ -1,27 +1,42 @@
 """Gemini AI tools: analyze content (text, image, video) to understand what's happening."""
 import asyncio
-import base64
+import functools
+import hashlib
 import io
-import json
+import logging
+import os
+import tempfile
 from typing import Optional, Union
 from pathlib import Path
 
-import PIL.Image
 import google.generativeai as genai
-from google import genai as genai_live
-from google.genai import types
+import httpx
 
 try:
     from server.config import config
-    from server.prompts import IMAGE_PROMPT, VIDEO_PROMPT
+    from server.prompts import CONVERSATION_PROMPT, IMAGE_PROMPT, VIDEO_PROMPT
+    from server.services.http_client import get_http_client
+    from server.services.parsing import parse_json_reply
+    from server.services.response_cache import cache_get, cache_put, coalesced, make_cache_key
+    from server.services.retry import RETRYABLE_STATUS_CODES, sleep_backoff
 except ModuleNotFoundError:
     # Fall back to relative import (for Railway deployment)
     from config import config
-    from prompts import IMAGE_PROMPT, VIDEO_PROMPT
+    from prompts import CONVERSATION_PROMPT, IMAGE_PROMPT, VIDEO_PROMPT
+    from services.http_client import get_http_client
+    from services.parsing import parse_json_reply
+    from services.response_cache import cache_get, cache_put, coalesced, make_cache_key
+    from services.retry import RETRYABLE_STATUS_CODES, sleep_backoff
+
+logger = logging.getLogger(__name__)
 
 # Configure Gemini
 genai.configure(api_key=config.GEMINI_API_KEY)
 
+# Caps concurrent Gemini calls (generate_content and Live sessions) across
+# all callers, so bursts don't trip rate limits
+_gemini_semaphore = asyncio.Semaphore(config.GEMINI_CONCURRENCY)
+
 
 class GeminiModels:
     """Available models."""
@@ -40,42 +55,209 @@ GEMINI_MODELS = {
 }
 
 
+@functools.lru_cache(maxsize=None)
+def get_generative_model(model: str) -> genai.GenerativeModel:
+    """Return the shared GenerativeModel for a model name (built on first use)."""
+    return genai.GenerativeModel(model)
+
+
+def sniff_image_mime(data: bytes) -> Optional[str]:
+    """Return the MIME type for JPEG/PNG/WebP bytes (by magic number), else None."""
+    if data[:3] == b'\xff\xd8\xff':
+        return 'image/jpeg'
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'image/png'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
 async def analyze_image(
     image_data: Union[bytes, str, Path],
     text: Optional[str] = None,
     model: str = GeminiModels.FLASH) -> Optional[str]:
     """Analyze image (with optional text) and describe what's happening."""
     try:
-        if isinstance(image_data, (str, Path)):
-            img = PIL.Image.open(image_data)
+        mime_type = sniff_image_mime(image_data) if isinstance(image_data, bytes) else None
+        if mime_type:
+            # Gemini takes the encoded bytes inline; no need to decode them first
+            img = {"mime_type": mime_type, "data": image_data}
         else:
-            img = PIL.Image.open(io.BytesIO(image_data))
+            # Deferred so importing this module (and server.main) doesn't load Pillow
+            import PIL.Image
 
-        context = f'Additional context from message: "{text}"' if text else ''
-        prompt = IMAGE_PROMPT.format(context=context)
+            if isinstance(image_data, (str, Path)):
+                img = PIL.Image.open(image_data)
+            else:
+                img = PIL.Image.open(io.BytesIO(image_data))
 
-        response = genai.GenerativeModel(model).generate_content([prompt, img])
-        return response.text.strip()
+        context = f'Additional context from message: "{text}"' if text else ''
+        prompt = IMAGE_PROMPT.substitute(context=context)
+
+        # Re-sent or forwarded photos (same bytes, same caption) skip Gemini
+        cache_key = None
+        if isinstance(image_data, bytes):
+            cache_key = make_cache_key(model, prompt, hashlib.sha256(image_data).hexdigest())
+            cached = cache_get(cache_key)
+            if cached is not None:
+                logger.info("🖼️  Image analysis (cached)")
+                return cached
+
+        async def generate() -> str:
+            async with _gemini_semaphore:
+                response = await get_generative_model(model).generate_content_async([prompt, img])
+            description = response.text.strip()
+            if cache_key is not None:
+                cache_put(cache_key, description)
+            return description
+
+        if cache_key is None:
+            return await generate()
+        return await coalesced(cache_key, generate)
     except Exception as e:
-        print(f"❌ Error in analyze_image: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in analyze_image: %s", e)
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def get_live_client():
+    """Lazily build the shared Gemini Live API client on first use."""
+    from google import genai as genai_live
+
+    return genai_live.Client(
+        http_options={"api_version": "v1beta"},
+        api_key=config.GEMINI_API_KEY
+    )
+
+
+# Longest side of the frames sent to the Live API
+FRAME_MAX_SIDE = 768
+# JPEG quality for Live API frames; plenty for 311 scenes at 768px
+FRAME_JPEG_QUALITY = 70
+# Frames whose dHash is within this many bits of the last sent frame are
+# skipped, so a static scene (parked car, graffiti wall) is sent once
+FRAME_DEDUP_MAX_DISTANCE = 5
+# Grayscale min-max range at or below which a frame counts as blank
+FRAME_BLANK_RANGE = 8
+
+
+def _frame_size(infos: dict) -> tuple[int, int]:
+    """Output frame size: the displayed (rotated) video size fit in FRAME_MAX_SIDE, even dims."""
+    width, height = infos["video_size"]
+    # moviepy reports rotation signed (-90 for a clockwise-rotated phone video)
+    if abs(infos.get("video_rotation") or 0) in (90, 270):
+        # ffmpeg autorotates its output
+        width, height = height, width
+    factor = min(1.0, FRAME_MAX_SIDE / max(width, height))
+    return max(2, int(width * factor) // 2 * 2), max(2, int(height * factor) // 2 * 2)
+
+
+async def _ffmpeg_chunks(ffmpeg: str, args: list[str], chunk_size: int, keep_partial: bool = False):
+    """
+    Run ffmpeg writing to stdout and yield its output in chunk_size pieces.
+
+    A short final piece is yielded only with keep_partial. The process is
+    killed if the consumer stops early. If ffmpeg exits with an error (corrupt
+    or unsupported video) a RuntimeError with the tail of its stderr is raised
+    once the output ends, instead of just yielding nothing.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        ffmpeg, "-v", "error", *args, "-",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    # Drained concurrently so a chatty failure can't fill the pipe and stall ffmpeg
+    stderr = asyncio.ensure_future(proc.stderr.read())
+    try:
+        while True:
+            try:
+                chunk = await proc.stdout.readexactly(chunk_size)
+            except asyncio.IncompleteReadError as e:
+                if keep_partial and e.partial:
+                    yield e.partial
+                break
+            yield chunk
+
+        returncode = await proc.wait()
+        if returncode != 0:
+            errors = (await stderr).decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"ffmpeg exited with status {returncode}: {errors[-500:]}")
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        stderr.cancel()
+
+
+def _frame_hash(gray) -> int:
+    """64-bit difference hash (dHash) of a grayscale image: one bit per horizontal gradient."""
+    import PIL.Image
+
+    pixels = gray.resize((9, 8), PIL.Image.Resampling.BILINEAR).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            bits = (bits << 1) | (left > pixels[row * 9 + col + 1])
+    return bits
+
+
+def _encode_frame(rgb: bytes, size: tuple[int, int], last_hash: Optional[int]) -> tuple[Optional[int], Optional[bytes]]:
+    """
+    Encode a raw RGB24 frame (already scaled by ffmpeg) as JPEG (CPU-bound, run in a thread).
+
+    Returns (hash, jpeg). jpeg is None when the frame should be skipped:
+    blank (all black/white/one colour) or within FRAME_DEDUP_MAX_DISTANCE bits
+    of last_hash, the hash of the last frame sent. Blank frames return
+    last_hash unchanged.
+    """
+    import PIL.Image
+
+    img = PIL.Image.frombuffer("RGB", size, rgb, "raw", "RGB", 0, 1)
+
+    gray = img.convert("L")
+    low, high = gray.getextrema()
+    if high - low <= FRAME_BLANK_RANGE:
+        return last_hash, None
+
+    frame_hash = _frame_hash(gray)
+    if last_hash is not None and (frame_hash ^ last_hash).bit_count() <= FRAME_DEDUP_MAX_DISTANCE:
+        return last_hash, None
+
+    buf = io.BytesIO()
+    # Single-pass Huffman coding: optimize=True roughly doubles encode time
+    img.save(buf, format="jpeg", quality=FRAME_JPEG_QUALITY, optimize=False, progressive=False)
+    return frame_hash, buf.getvalue()
+
+
+@functools.lru_cache(maxsize=1)
+def _load_video_deps():
+    """
+    Import the video/Live API deps on the first video, once per process.
+
+    Kept out of module scope so importing this module (and server.main) stays
+    cheap. Returns (FFMPEG_BINARY, ffmpeg_parse_infos, genai types), or None
+    when they aren't installed; that is logged once rather than per video.
+    """
+    try:
+        from moviepy.config import FFMPEG_BINARY
+        from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+        from google.genai import types
+    except ImportError:
+        logger.error('❌ [VIDEO] Install: pip install moviepy pillow google-genai')
         return None
+    return FFMPEG_BINARY, ffmpeg_parse_infos, types
+
 
 async def analyze_video(
     video_data: Union[bytes, str, Path],
     model: str = GeminiModels.LIVE_FLASH,
     max_duration: float = 10.0) -> Optional[str]:
     """Analyze video using Gemini Live API and describe what's happening."""
-    try:
-        from moviepy import VideoFileClip
-        import numpy as np
-    except ImportError:
-        print('❌ [VIDEO] Install: pip install moviepy pillow numpy')
+    deps = _load_video_deps()
+    if deps is None:
         return None
-
-    import tempfile
-    import os
+    FFMPEG_BINARY, ffmpeg_parse_infos, types = deps
 
     temp_path = None
     try:
@@ -89,12 +271,11 @@ async def analyze_video(
         else:
             video_path = str(video_data)
 
-        clip = VideoFileClip(video_path)
+        infos = ffmpeg_parse_infos(video_path)
+        duration = min(infos["duration"], max_duration)
+        frame_size = _frame_size(infos)
 
-        client = genai_live.Client(
-            http_options={"api_version": "v1beta"},
-            api_key=config.GEMINI_API_KEY
-        )
+        client = get_live_client()
 
         config_live = types.LiveConnectConfig(
             response_modalities=["TEXT"],
@@ -104,73 +285,67 @@ async def analyze_video(
             )
         )
 
-        queue = asyncio.Queue(maxsize=20)
         result = None
 
-        async def send_frames():
-            duration = min(clip.duration, max_duration)
-            for t in np.arange(0, duration, 1.0):  # 1 FPS
-                frame = clip.get_frame(t)
-                img = PIL.Image.fromarray(frame)
-                img.thumbnail([768, 768])
-
-                buf = io.BytesIO()
-                img.save(buf, format="jpeg")
-
-                await queue.put({
-                    "mime_type": "image/jpeg",
-                    "data": base64.b64encode(buf.getvalue()).decode()
-                })
-                await asyncio.sleep(1.0)
-
-        async def send_audio():
-            if not clip.audio:
+        async def send_frames(session):
+            # One linear ffmpeg decode: it drops to 1 FPS and scales before
+            # converting to RGB, so only the sampled frames cross the pipe.
+            # Bilinear is cheaper than the default bicubic and looks the same
+            # when downscaling to FRAME_MAX_SIDE
+            width, height = frame_size
+            args = [
+                "-t", str(duration), "-i", video_path,
+                "-vf", f"fps=1,scale={width}:{height}:flags=bilinear",
+                "-f", "rawvideo", "-pix_fmt", "rgb24"
+            ]
+            last_hash = None
+            sent = 0
+            async for rgb in _ffmpeg_chunks(FFMPEG_BINARY, args, width * height * 3):
+                # Keep the event loop free for audio while hashing and libjpeg run
+                last_hash, data = await asyncio.to_thread(_encode_frame, rgb, frame_size, last_hash)
+                if data is None:
+                    continue
+
+                # Raw bytes in a Blob; the SDK handles wire encoding. Awaiting
+                # the socket send is the only pacing needed
+                await session.send(input=types.Blob(mime_type="image/jpeg", data=data))
+                sent += 1
+            logger.debug("[VIDEO] sent %d distinct frames", sent)
+
+        async def send_audio(session):
+            if not infos.get("audio_found"):
                 return
 
-            audio = clip.audio.to_soundarray(fps=16000)
-            if len(audio.shape) > 1:
-                audio = audio.mean(axis=1)
-            audio = (audio * 32767).astype(np.int16)
-
-            chunk_size = 1024
-            for i in range(0, len(audio), chunk_size):
-                await queue.put({
-                    "mime_type": "audio/pcm",
-                    "data": audio[i:i+chunk_size].tobytes()
-                })
-                await asyncio.sleep(chunk_size / 16000)
-
-        async def send_to_session(session):
-            frames = int(min(clip.duration, max_duration))
-            count = 0
-            while True:
-                msg = await queue.get()
-                if msg is None:
-                    break
-                count += 1
-                await session.send(input=msg, end_of_turn=(count >= frames))
+            # ffmpeg decodes, downmixes to mono, resamples to 16 kHz and emits
+            # s16le PCM itself; 1024-sample chunks go straight into Blobs
+            args = [
+                "-t", str(duration), "-i", video_path,
+                "-vn", "-ac", "1", "-ar", "16000", "-f", "s16le"
+            ]
+            async for pcm in _ffmpeg_chunks(FFMPEG_BINARY, args, 2048, keep_partial=True):
+                await session.send(input=types.Blob(mime_type="audio/pcm", data=pcm))
 
         async def receive(session):
             nonlocal result
             full_text = []
             try:
-                while True:
-                    turn = session.receive()
-                    async for response in turn:
-                        if response.text:
-                            full_text.append(response.text)
-            except:
-                pass
-            result = ''.join(full_text).strip()
-
-        async with client.aio.live.connect(model=model, config=config_live) as session:
+                # One turn: the SDK stops iterating at turn_complete
+                async for response in session.receive():
+                    if response.text:
+                        full_text.append(response.text)
+            except Exception as e:
+                # The session closing ends the loop; anything else is worth seeing
+                logger.debug("[VIDEO] receive loop ended: %r", e)
+            finally:
+                result = ''.join(full_text).strip()
+
+        async with _gemini_semaphore, client.aio.live.connect(model=model, config=config_live) as session:
             async with asyncio.TaskGroup() as tg:
-                tg.create_task(send_frames())
-                tg.create_task(send_audio())
-                tg.create_task(send_to_session(session))
                 tg.create_task(receive(session))
-
-        clip.close()
+                # Producers write straight to the session; once both are done
+                # an empty end-of-turn message asks the model to answer
+                await asyncio.gather(send_frames(session), send_audio(session))
+                await session.send(input={}, end_of_turn=True)
 
         # Clean up temp file if created
         if temp_path and os.path.exists(temp_path):
@@ -179,15 +354,47 @@ async def analyze_video(
         return result
 
     except Exception as e:
-        print(f'❌ [VIDEO] {e}')
+        logger.exception('❌ [VIDEO] %s', e)
         # Clean up temp file if created
         if temp_path and os.path.exists(temp_path):
             os.unlink(temp_path)
         return None
 
+
+# Split timeouts: a dead host fails fast, and a stalled read doesn't wait out
+# a single whole-request budget
+MEDIA_FETCH_TIMEOUT = httpx.Timeout(
+    connect=5.0, read=config.MEDIA_FETCH_TIMEOUT_SECONDS, write=10.0, pool=5.0
+)
+
+
+async def _download_media(url: str, auth: Optional[tuple[str, str]]) -> tuple[int, Optional[bytes]]:
+    """
+    Stream a media download, enforcing config.MAX_MEDIA_BYTES.
+
+    Returns the status code and body (None unless 200). Raises ValueError if
+    the media is larger than the cap, without reading the rest of it.
+    """
+    # Shared client: repeated media fetches reuse the pooled TLS connection
+    async with get_http_client().stream("GET", url, auth=auth, timeout=MEDIA_FETCH_TIMEOUT) as response:
+        if response.status_code != 200:
+            return response.status_code, None
+
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > config.MAX_MEDIA_BYTES:
+            raise ValueError(f"media is {content_length} bytes (limit {config.MAX_MEDIA_BYTES})")
+
+        buf = bytearray()
+        async for chunk in response.aiter_bytes(65536):
+            buf += chunk
+            if len(buf) > config.MAX_MEDIA_BYTES:
+                raise ValueError(f"media exceeds {config.MAX_MEDIA_BYTES} bytes")
+        return response.status_code, bytes(buf)
+
+
 async def fetch_media_bytes(url: str) -> Optional[bytes]:
     """
-    Fetch media from a URL into memory.
+    Fetch media from a URL into memory (streamed, capped at MAX_MEDIA_BYTES).
 
     For Twilio media URLs, uses HTTP Basic Auth with Account SID and Auth Token.
 
@@ -198,10 +405,7 @@ async def fetch_media_bytes(url: str) -> Optional[bytes]:
         Media bytes, or None if fetch fails
     """
     try:
-        import requests
-        from requests.auth import HTTPBasicAuth
-
-        print(f"📥 Fetching media from: {url}")
+        logger.info("📥 Fetching media from: %s", url)
 
         # Check if this is a Twilio media URL
         auth = None
@@ -211,30 +415,61 @@ async def fetch_media_bytes(url: str) -> Optional[bytes]:
             auth_token = config.TWILIO_AUTH_TOKEN
 
             if account_sid and auth_token:
-                auth = HTTPBasicAuth(account_sid, auth_token)
-                print(f"🔐 Using Twilio authentication")
+                auth = (account_sid, auth_token)
+                logger.debug("🔐 Using Twilio authentication")
             else:
-                print(f"⚠️  Warning: Twilio credentials not found in environment")
-
-        response = requests.get(url, auth=auth, timeout=30)
+                logger.warning("⚠️  Twilio credentials not found in environment")
 
-        if response.status_code != 200:
-            print(f"❌ Fetch failed with status {response.status_code}")
-            if response.status_code == 401:
-                print(f"❌ Authentication failed - check TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN")
+        # Media GETs are idempotent, so transport errors and 5xx are retried
+        for attempt in range(config.MAX_RETRIES):
+            last_attempt = attempt == config.MAX_RETRIES - 1
+            try:
+                status_code, content = await _download_media(url, auth)
+            except httpx.TransportError as e:
+                if last_attempt:
+                    raise
+                logger.warning("⚠️  Media fetch failed (%s), retrying...", type(e).__name__)
+                await sleep_backoff(attempt)
+                continue
+
+            if status_code in RETRYABLE_STATUS_CODES and not last_attempt:
+                logger.warning("⚠️  Media fetch returned %s, retrying...", status_code)
+                await sleep_backoff(attempt)
+                continue
+            break
+
+        if status_code != 200:
+            logger.error("❌ Fetch failed with status %s", status_code)
+            if status_code == 401:
+                logger.error("❌ Authentication failed - check TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN")
             return None
 
-        content = response.content
-        print(f"✅ Fetched {len(content)} bytes")
+        logger.info("✅ Fetched %s bytes", len(content))
         return content
 
     except Exception as e:
-        print(f"❌ Error fetching media: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error fetching media: %s", e)
         return None
 
 
+# Native structured output for analyze_conversation: Gemini returns bare JSON
+# matching this schema, with no fences or prose to strip
+CONVERSATION_JSON_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "OBJECT",
+        "properties": {
+            "reporting": {"type": "STRING", "nullable": True},
+            "location": {"type": "STRING", "nullable": True},
+            "needs_clarification": {"type": "BOOLEAN"},
+            "clarification_question": {"type": "STRING", "nullable": True},
+            "response_message": {"type": "STRING"},
+        },
+        "required": ["needs_clarification", "response_message"],
+    },
+}
+
+
 async def analyze_conversation(messages: list[dict], model: str = GeminiModels.FLASH) -> dict:
     """
     Analyze conversation history to extract what's being reported and where.
@@ -253,75 +488,26 @@ async def analyze_conversation(messages: list[dict], model: str = GeminiModels.F
     """
     try:
         # Build conversation history
-        conversation = []
-        for msg in messages:
-            role = "user" if msg.get("is_from_user") else "assistant"
-            content = msg.get("content", "")
-            conversation.append(f"{role.upper()}: {content}")
-
-        conversation_text = "\n".join(conversation)
-
-        prompt = f"""You are a helpful assistant for SF 311 service requests. Your job is to understand what issue the user is reporting and where it's located.
-
-Analyze the following conversation and extract:
-1. **reporting**: What is being reported (e.g., "broken pothole", "graffiti", "illegal dumping")
-2. **location**: Where is it located (full address if possible, e.g., "1160 Mission Street, San Francisco")
-
-If BOTH reporting and location are clear, set needs_clarification to false and provide a confirmation message.
-If EITHER is unclear or missing, set needs_clarification to true and ask specifically for what's missing.
-
-CONVERSATION HISTORY:
-{conversation_text}
-
-Respond with ONLY valid JSON in this exact format:
-{{
-    "reporting": "what is being reported or null if unclear",
-    "location": "where it is located or null if unclear",
-    "needs_clarification": true/false,
-    "clarification_question": "question to ask if needs_clarification is true, otherwise null",
-    "response_message": "friendly message to send to the user"
-}}
-
-Examples:
-
-If user says "there's a pothole on mission street":
-{{
-    "reporting": "pothole",
-    "location": "Mission Street",
-    "needs_clarification": true,
-    "clarification_question": "Can you provide the exact address or cross streets for the pothole on Mission Street?",
-    "response_message": "I understand there's a pothole on Mission Street. Can you provide the exact address or cross streets so I can submit this to SF 311?"
-}}
-
-If user says "broken pothole at 1160 mission street":
-{{
-    "reporting": "pothole",
-    "location": "1160 Mission Street",
-    "needs_clarification": false,
-    "clarification_question": null,
-    "response_message": "Got it! I'll submit a report for a pothole at 1160 Mission Street to SF 311."
-}}
-
-Now analyze the conversation above and respond with JSON only:"""
-
-        response = genai.GenerativeModel(model).generate_content(prompt)
-        result_text = response.text.strip()
+        conversation_text = "\n".join(
+            ("USER: " if msg.get("is_from_user") else "ASSISTANT: ") + (msg.get("content") or "")
+            for msg in messages
+        )
+
+        prompt = CONVERSATION_PROMPT.substitute(conversation_text=conversation_text)
 
-        # Try to extract JSON from response
-        # Sometimes the model wraps it in ```json blocks
-        if "```json" in result_text:
-            result_text = result_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in result_text:
-            result_text = result_text.split("```")[1].split("```")[0].strip()
+        async with _gemini_semaphore:
+            response = await get_generative_model(model).generate_content_async(
+                prompt, generation_config=CONVERSATION_JSON_CONFIG
+            )
+        result_text = response.text.strip()
 
-        result = json.loads(result_text)
-        print(f"💬 Conversation analysis: {result}")
+        # JSON mode returns bare JSON, so this takes the direct-parse path
+        result = parse_json_reply(result_text)
+        logger.debug("💬 Conversation analysis: %s", result)
         return result
 
     except Exception as e:
-        print(f"❌ Error in analyze_conversation: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in analyze_conversation: %s", e)
         # Return a fallback response
         return {
             "reporting": None,
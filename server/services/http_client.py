@@ -0,0 +1,32 @@
+"""Shared outbound HTTP client (Twilio media downloads, SF 311 form posts)."""
+from typing import Optional
+
+import httpx
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared keep-alive HTTP client for outbound requests.
+
+    Used for Twilio media downloads and SF 311 form submissions; callers pass
+    their own per-request timeouts.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            timeout=30.0,
+            # Twilio media URLs redirect to their CDN
+            follow_redirects=True
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client (called on app shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
@@ -0,0 +1,67 @@
+"""Helpers for parsing structured replies from LLM responses."""
+import re
+from typing import Optional
+
+import orjson
+
+# First fenced block, with or without a language tag
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+def _first_json_object(text: str) -> Optional[str]:
+    """
+    Return the first balanced {...} span in text, or None.
+
+    Single pass tracking brace depth; braces inside JSON strings (including
+    escaped quotes) are ignored.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+def parse_json_reply(text: str):
+    """
+    Parse the JSON object in a model reply.
+
+    Well-formed replies are parsed directly; otherwise the first ``` fenced
+    block is used, and failing that the first balanced {...} object in the
+    reply (so prose around the JSON is ignored). Raises ValueError
+    (orjson.JSONDecodeError) if nothing parses.
+    """
+    text = text.strip()
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        match = _FENCE_RE.search(text)
+        if match is not None:
+            try:
+                return orjson.loads(match.group(1))
+            except orjson.JSONDecodeError:
+                pass
+        candidate = _first_json_object(text)
+        if candidate is None:
+            raise
+        return orjson.loads(candidate)
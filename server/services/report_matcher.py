@@ -0,0 +1,78 @@
+"""Regex matching for complete SF 311 reports that don't need an LLM."""
+import re
+from typing import Optional
+
+try:
+    from server.services.response_cache import normalize_text
+except ModuleNotFoundError:
+    from services.response_cache import normalize_text
+
+# Reply sent once a report has been filed. Later turns find it in the history,
+# so the same report is never submitted twice (see was_submitted).
+SUBMITTED_RESPONSE = "Perfect! I've submitted your report for {reporting} at {location} to SF 311. You should receive a case number shortly."
+_SUBMITTED_RE = re.compile(r"^Perfect! I've submitted your report for (.+) at (.+) to SF 311\.")
+
+# Complete single-message reports ("pothole at 1160 Mission St"). The address
+# needs a house number, a street name without connector/issue words and a
+# street suffix, so "3 potholes on mission street" never matches.
+_ISSUE_RE = re.compile(r"\b(pothole|graffiti|illegal dumping|dumping)s?\b", re.IGNORECASE)
+_ADDRESS_RE = re.compile(
+    r"\b\d{1,5}\s+"
+    r"(?:(?!(?:on|at|near|by|in|of|and|the|potholes?|graffiti|dumping)\b)[A-Za-z0-9]+\s+){1,3}?"
+    r"(?:st|street|ave|avenue|blvd|boulevard|rd|road|way|dr|drive|ln|lane|pl|place|ct|court)\b\.?",
+    re.IGNORECASE
+)
+# Negations, fixed/gone issues and follow-ups about an earlier report ("no
+# pothole at ... anymore", "what's the status of ...?") are not new reports
+_NOT_NEW_REPORT_RE = re.compile(
+    r"\?|n't\b|\b(?:no|not|never|anymore|fixed|repaired|gone|cleaned|status|"
+    r"update|already|reported|case)\b",
+    re.IGNORECASE
+)
+
+
+def match_complete_report(messages: list[dict]) -> Optional[tuple[str, str]]:
+    """
+    Return (reporting, location) when the user's new text names both a
+    supported issue and a street address, or None to fall through to the LLM.
+
+    Texts that negate the issue, say it was fixed, or ask about an earlier
+    report (including any question) never match.
+
+    Only the user's messages since the last assistant reply are considered, so
+    a report that was already handled is never matched again.
+    """
+    for msg in reversed(messages):
+        if not msg.get("is_from_user"):
+            break
+        if msg.get("content_type") != "text":
+            continue
+
+        content = msg.get("content") or ""
+        if _NOT_NEW_REPORT_RE.search(content):
+            continue
+        issue = _ISSUE_RE.search(content)
+        address = _ADDRESS_RE.search(content)
+        if issue and address:
+            reporting = issue.group(1).lower()
+            if reporting == "dumping":
+                reporting = "illegal dumping"
+            return reporting, address.group(0).rstrip(".")
+    return None
+
+
+def _same_text(a: str, b: str) -> bool:
+    """Loose equality for re-derived fields ("1160 Mission St" vs "1160 Mission Street, SF")."""
+    a, b = normalize_text(a), normalize_text(b)
+    return bool(a and b) and (a in b or b in a)
+
+
+def was_submitted(messages: list[dict], reporting: str, location: str) -> bool:
+    """Return True if an assistant reply in messages already confirmed filing this report."""
+    for msg in messages:
+        if msg.get("is_from_user"):
+            continue
+        submitted = _SUBMITTED_RE.match(msg.get("content") or "")
+        if submitted and _same_text(submitted.group(1), reporting) and _same_text(submitted.group(2), location):
+            return True
+    return False
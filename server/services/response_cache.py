@@ -0,0 +1,77 @@
+"""In-process response cache and in-flight coalescing shared by the LLM services."""
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+
+import orjson
+
+# Exact-match response cache: sha256 key -> (expires_at, orjson-serialized result)
+RESPONSE_CACHE_MAXSIZE = 10000
+RESPONSE_CACHE_TTL_SECONDS = 1800
+_response_cache: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()
+
+# Cache key -> in-flight call, so concurrent identical requests share one call
+_inflight: "dict[str, asyncio.Future]" = {}
+
+
+# Near-duplicate collapsing for the cache key: case, punctuation, spacing and
+# common street-suffix abbreviations are ignored. Embedding similarity is not
+# used because two reports can differ only in the street number.
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+_STREET_ABBREVIATIONS = {
+    "st": "street",
+    "ave": "avenue",
+    "av": "avenue",
+    "blvd": "boulevard",
+    "rd": "road",
+    "dr": "drive",
+    "ln": "lane",
+    "pl": "place",
+    "ct": "court",
+    "hwy": "highway",
+}
+
+
+def normalize_text(text: str) -> str:
+    """Canonicalize free text so trivially paraphrased reports share a cache key."""
+    words = _NON_WORD_RE.sub(" ", text.lower()).split()
+    return " ".join(_STREET_ABBREVIATIONS.get(word, word) for word in words)
+
+
+def make_cache_key(*parts: str) -> str:
+    """Build a cache key from the model name and request inputs."""
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+def cache_get(key: str):
+    """Return a fresh copy of a cached result, or None if missing/expired."""
+    entry = _response_cache.get(key)
+    if entry is None:
+        return None
+    expires_at, payload = entry
+    if expires_at < time.monotonic():
+        del _response_cache[key]
+        return None
+    _response_cache.move_to_end(key)
+    return orjson.loads(payload)
+
+
+def cache_put(key: str, result) -> None:
+    """Store a result, evicting the least recently used entries past maxsize."""
+    _response_cache[key] = (time.monotonic() + RESPONSE_CACHE_TTL_SECONDS, orjson.dumps(result))
+    _response_cache.move_to_end(key)
+    while len(_response_cache) > RESPONSE_CACHE_MAXSIZE:
+        _response_cache.popitem(last=False)
+
+
+async def coalesced(key: str, fetch):
+    """Await fetch() once per key at a time; concurrent callers share its result."""
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(fetch())
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shielded so one caller giving up doesn't cancel the call for the others
+    return await asyncio.shield(future)
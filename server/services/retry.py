@@ -0,0 +1,15 @@
+"""Backoff helper shared by the retry loops around outbound calls."""
+import asyncio
+import random
+
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+
+# Upstream statuses worth another attempt; other errors are returned as-is
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+
+
+async def sleep_backoff(attempt: int) -> None:
+    """Sleep before retry number attempt + 1: exponential with full jitter."""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+    await asyncio.sleep(random.uniform(0, delay))
@@ -0,0 +1,51 @@
+"""Tests for the regex report matcher and the already-submitted guard."""
+import unittest
+
+from server.services.report_matcher import SUBMITTED_RESPONSE, match_complete_report, was_submitted
+
+
+def user(text: str) -> dict:
+    return {"is_from_user": True, "content_type": "text", "content": text}
+
+
+def assistant(text: str) -> dict:
+    return {"is_from_user": False, "content_type": "text", "content": text}
+
+
+SUBMITTED_HISTORY = [
+    user("pothole at 1160 Mission St"),
+    assistant("Got it: pothole at 1160 Mission St. Reply YES and I'll submit it to SF 311."),
+    user("yes"),
+    assistant(SUBMITTED_RESPONSE.format(reporting="pothole", location="1160 Mission St")),
+]
+
+
+class FollowUpAfterSubmissionTest(unittest.TestCase):
+    def test_follow_up_question_is_not_resubmitted(self):
+        messages = SUBMITTED_HISTORY + [user("how long will that take?")]
+        self.assertIsNone(match_complete_report(messages))
+        # The model re-derives the same report, with slightly different wording
+        self.assertTrue(was_submitted(messages, "pothole", "1160 Mission Street, San Francisco"))
+
+    def test_follow_up_detail_is_not_resubmitted(self):
+        messages = SUBMITTED_HISTORY + [user("also it's getting bigger")]
+        self.assertTrue(was_submitted(messages, "a pothole", "1160 Mission St"))
+
+    def test_new_report_after_submission_is_allowed(self):
+        messages = SUBMITTED_HISTORY + [user("there's also graffiti at 55 Market Street")]
+        self.assertEqual(match_complete_report(messages), ("graffiti", "55 Market Street"))
+        self.assertFalse(was_submitted(messages, "graffiti", "55 Market Street"))
+        self.assertFalse(was_submitted(messages, "pothole", "1170 Mission Street"))
+
+
+class MatchCompleteReportTest(unittest.TestCase):
+    def test_negated_and_status_texts_do_not_match(self):
+        for text in (
+            "no pothole at 1160 Mission St anymore, it got fixed",
+            "I reported a pothole at 1160 Mission St yesterday, what is the status?",
+        ):
+            self.assertIsNone(match_complete_report([user(text)]), text)
+
+
+if __name__ == "__main__":
+    unittest.main()